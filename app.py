@@ -1,15 +1,31 @@
-from collections import defaultdict, deque
-from datetime import date, datetime, timedelta
+import atexit
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime, time as dt_time, timedelta
 import hashlib
+import importlib.util
+import json
+import mimetypes
 import os
 from pathlib import Path
-import subprocess
-import sys
 from functools import wraps
+import threading
 import time
 from zoneinfo import ZoneInfo
 
-from flask import Flask, abort, redirect, render_template, request
+from flask import (
+    Flask,
+    Response,
+    abort,
+    g,
+    has_request_context,
+    jsonify,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    send_from_directory,
+    url_for,
+)
 import markdown
 from flask_login import (
     LoginManager,
@@ -21,7 +37,9 @@ from flask_login import (
 )
 from werkzeug.security import check_password_hash
 
-from db import get_connection, set_audit_user_id
+from compression import COMPRESSIBLE_MIMETYPES, choose_encoding, compress_body
+from db import add_query_listener, connect, get_connection, set_audit_user_id
+from rate_limit import PostgresTokenBucketLimiter, TokenBucketLimiter
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-secret")
@@ -31,12 +49,26 @@ login_manager = LoginManager()
 login_manager.login_view = "login_view"
 login_manager.init_app(app)
 
+def get_db():
+    if "db_conn" not in g:
+        g.db_conn = get_connection()
+    return g.db_conn
+
+
+@app.teardown_appcontext
+def close_db(exception):
+    conn = g.pop("db_conn", None)
+    if conn is not None:
+        conn.close()
+
+
 class AuthUser(UserMixin):
-    def __init__(self, user_id, email, role, team_id=None, is_active=True):
+    def __init__(self, user_id, email, role, team_id=None, is_active=True, team_name=None):
         self.id = user_id
         self.email = email
         self.role = role
         self.team_id = team_id
+        self.team_name = team_name
         self.active = bool(is_active)
 
     @property
@@ -47,54 +79,119 @@ class AuthUser(UserMixin):
 @app.context_processor
 def inject_nav_user_label():
     label = ""
-    active_count = 0
-    display_count = 0
     if current_user.is_authenticated:
         if current_user.team_id:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM teams WHERE id = %s", (current_user.team_id,))
-            row = cursor.fetchone()
-            conn.close()
-            if row:
-                label = row["name"]
+            label = current_user.team_name or ""
         elif current_user.role == "admin":
             label = "League Admin"
         else:
             label = current_user.email
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        SELECT COUNT(*) AS count
-        FROM active_sessions
-        WHERE last_seen_at >= (CURRENT_TIMESTAMP - (%s * INTERVAL '1 minute'))
-        """,
-        (ACTIVE_WINDOW_MINUTES,),
-    )
-    active_count = cursor.fetchone()["count"]
-    conn.close()
+    # Shared (cached or revalidated) pages leave the count for heartbeat.js to fill in.
+    active_user_count = None if g.get("shared_page") else get_active_user_count()
+    return {"nav_user_label": label, "active_user_count": active_user_count}
+
+
+def get_active_user_count():
+    active_count = get_active_session_count()
     other_users = active_count - 1 if current_user.is_authenticated and active_count > 0 else active_count
-    return {"nav_user_label": label, "active_user_count": other_users + 1}
+    return other_users + 1
+
+
+def get_cached_user(user_id):
+    key = str(user_id)
+    with USER_CACHE_LOCK:
+        entry = USER_CACHE.get(key)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del USER_CACHE[key]
+            return None
+        USER_CACHE.move_to_end(key)
+        return user
+
+
+def cache_user(user):
+    start_user_change_listener()
+    key = str(user.id)
+    with USER_CACHE_LOCK:
+        USER_CACHE[key] = (user, time.monotonic() + USER_CACHE_TTL_SECONDS)
+        USER_CACHE.move_to_end(key)
+        while len(USER_CACHE) > USER_CACHE_MAX_ENTRIES:
+            USER_CACHE.popitem(last=False)
+
+
+def invalidate_cached_user(user_id=None):
+    with USER_CACHE_LOCK:
+        if user_id is None:
+            USER_CACHE.clear()
+        else:
+            USER_CACHE.pop(str(user_id), None)
+
+
+def listen_for_user_changes():
+    while True:
+        try:
+            with connect() as conn:
+                conn.autocommit = True
+                conn.execute(f"LISTEN {USER_CHANGES_CHANNEL}")
+                invalidate_cached_user()
+                for notify in conn.notifies():
+                    if notify.payload.isdigit():
+                        invalidate_cached_user(notify.payload)
+                    else:
+                        invalidate_cached_user()
+        except Exception as exc:
+            print(f"Warning: user cache listener disconnected: {exc}")
+        invalidate_cached_user()
+        time.sleep(USER_CACHE_TTL_SECONDS)
+
+
+def start_user_change_listener():
+    with USER_CACHE_LOCK:
+        if USER_CACHE_STATE["listener"] is not None:
+            return
+        listener = threading.Thread(
+            target=listen_for_user_changes, name="user-cache-listener", daemon=True
+        )
+        USER_CACHE_STATE["listener"] = listener
+    listener.start()
+
+
+def build_auth_user(row):
+    return AuthUser(
+        row["id"],
+        row["email"],
+        row["role"],
+        row["team_id"],
+        row["is_active"],
+        row["team_name"],
+    )
 
 
 @login_manager.user_loader
 def load_user(user_id):
-    conn = get_connection()
+    user = get_cached_user(user_id)
+    if user is not None:
+        return user
+    start_user_change_listener()
+    conn = get_db()
     cursor = conn.cursor()
     cursor.execute(
         """
-        SELECT id, email, role, team_id, is_active
-        FROM user_accounts
-        WHERE id = %s
+        SELECT ua.id, ua.email, ua.role, ua.team_id, ua.is_active, t.name AS team_name
+        FROM user_accounts ua
+        LEFT JOIN teams t ON t.id = ua.team_id
+        WHERE ua.id = %s
         """,
         (user_id,),
     )
     row = cursor.fetchone()
-    conn.close()
     if not row:
         return None
-    return AuthUser(row["id"], row["email"], row["role"], row["team_id"], row["is_active"])
+    user = build_auth_user(row)
+    cache_user(user)
+    return user
 
 
 def owner_or_admin_required(view_func):
@@ -125,15 +222,172 @@ RATE_LIMITS = {
     "audit": (30, 60),
     "heartbeat": (2, 60),
 }
-REQUEST_HISTORY = defaultdict(deque)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
 ENFORCE_HTTPS = os.getenv("FORCE_HTTPS", "").lower() in {"1", "true", "yes"}
 AUTO_BUILD_NEWS = os.getenv("AUTO_BUILD_NEWS", "").lower() in {"1", "true", "yes"}
 EASTERN_TZ = ZoneInfo("America/New_York")
 HEARTBEAT_INTERVAL_SECONDS = 60
 ACTIVE_WINDOW_MINUTES = 10
 ACTIVE_CLEANUP_HOURS = 24
+ACTIVE_COUNT_TTL_SECONDS = int(os.getenv("ACTIVE_COUNT_TTL_SECONDS", "60"))
+ACTIVE_COUNT_CACHE = {"count": None, "expires_at": 0.0}
+ACTIVE_COUNT_LOCK = threading.Lock()
+HEARTBEAT_FLUSH_SECONDS = int(os.getenv("HEARTBEAT_FLUSH_SECONDS", "30"))
+ACTIVE_CLEANUP_INTERVAL_SECONDS = 60 * 60
+HEARTBEAT_BUFFER = {}
+HEARTBEAT_LOCK = threading.Lock()
+HEARTBEAT_STATE = {"flusher": None, "last_cleanup": None}
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "120"))
+USER_CACHE_MAX_ENTRIES = 1000
+USER_CHANGES_CHANNEL = "user_accounts_changed"
+USER_CACHE = OrderedDict()
+USER_CACHE_LOCK = threading.Lock()
+USER_CACHE_STATE = {"listener": None}
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "1").lower() in {"1", "true", "yes"}
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+RESPONSE_CACHE = OrderedDict()
+RESPONSE_CACHE_LOCK = threading.Lock()
+RESPONSE_CACHE_STATE = {"bytes": 0}
 
 RULES_PATH = Path(__file__).resolve().parent / "rules.md"
+APP_VERSION = os.getenv("APP_VERSION", "")
+TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
+STATIC_DIST_DIR = Path(__file__).resolve().parent / "static" / "dist"
+STATIC_MANIFEST_PATH = STATIC_DIST_DIR / "manifest.json"
+STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+RULES_CACHE = {"key": None, "html": None}
+RULES_CACHE_LOCK = threading.Lock()
+
+QUERY_STATS = {}
+QUERY_STATS_LOCK = threading.Lock()
+
+
+def load_active_session_count(cursor):
+    cursor.execute(
+        """
+        SELECT COUNT(*) AS count
+        FROM active_sessions
+        WHERE last_seen_at >= (CURRENT_TIMESTAMP - (%s * INTERVAL '1 minute'))
+        """,
+        (ACTIVE_WINDOW_MINUTES,),
+    )
+    return cursor.fetchone()["count"]
+
+
+def store_active_session_count(count):
+    with ACTIVE_COUNT_LOCK:
+        ACTIVE_COUNT_CACHE["count"] = count
+        ACTIVE_COUNT_CACHE["expires_at"] = time.monotonic() + ACTIVE_COUNT_TTL_SECONDS
+
+
+def get_active_session_count():
+    with ACTIVE_COUNT_LOCK:
+        if (
+            ACTIVE_COUNT_CACHE["count"] is not None
+            and time.monotonic() < ACTIVE_COUNT_CACHE["expires_at"]
+        ):
+            return ACTIVE_COUNT_CACHE["count"]
+    count = load_active_session_count(get_db().cursor())
+    store_active_session_count(count)
+    return count
+
+
+def write_heartbeats(cursor, pending, now):
+    session_keys = list(pending.keys())
+    entries = [pending[key] for key in session_keys]
+    cursor.execute(
+        """
+        INSERT INTO active_sessions (session_key, user_id, last_seen_at, user_agent, ip_address)
+        SELECT
+            v.session_key,
+            v.user_id,
+            CURRENT_TIMESTAMP - (v.age_seconds * INTERVAL '1 second'),
+            v.user_agent,
+            v.ip_address
+        FROM unnest(%s::text[], %s::int[], %s::float8[], %s::text[], %s::text[])
+            AS v(session_key, user_id, age_seconds, user_agent, ip_address)
+        ON CONFLICT (session_key)
+        DO UPDATE SET
+            user_id = EXCLUDED.user_id,
+            last_seen_at = GREATEST(active_sessions.last_seen_at, EXCLUDED.last_seen_at),
+            user_agent = EXCLUDED.user_agent,
+            ip_address = EXCLUDED.ip_address
+        """,
+        (
+            session_keys,
+            [entry["user_id"] for entry in entries],
+            [max(now - entry["seen_at"], 0.0) for entry in entries],
+            [entry["user_agent"] for entry in entries],
+            [entry["ip_address"] for entry in entries],
+        ),
+    )
+
+
+def delete_stale_sessions(cursor):
+    cursor.execute(
+        """
+        DELETE FROM active_sessions
+        WHERE last_seen_at < (CURRENT_TIMESTAMP - (%s * INTERVAL '1 hour'))
+        """,
+        (ACTIVE_CLEANUP_HOURS,),
+    )
+
+
+def flush_heartbeats():
+    with HEARTBEAT_LOCK:
+        pending = dict(HEARTBEAT_BUFFER)
+        HEARTBEAT_BUFFER.clear()
+    now = time.monotonic()
+    last_cleanup = HEARTBEAT_STATE["last_cleanup"]
+    cleanup_due = last_cleanup is None or now - last_cleanup >= ACTIVE_CLEANUP_INTERVAL_SECONDS
+    if not pending and not cleanup_due:
+        return
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            if pending:
+                write_heartbeats(cursor, pending, now)
+            if cleanup_due:
+                delete_stale_sessions(cursor)
+            count = load_active_session_count(cursor)
+    except Exception:
+        with HEARTBEAT_LOCK:
+            for session_key, entry in pending.items():
+                HEARTBEAT_BUFFER.setdefault(session_key, entry)
+        raise
+    if cleanup_due:
+        HEARTBEAT_STATE["last_cleanup"] = now
+    store_active_session_count(count)
+
+
+def heartbeat_flush_loop():
+    while True:
+        time.sleep(HEARTBEAT_FLUSH_SECONDS)
+        try:
+            flush_heartbeats()
+        except Exception as exc:
+            print(f"Warning: heartbeat flush failed: {exc}")
+
+
+def flush_heartbeats_on_exit():
+    try:
+        flush_heartbeats()
+    except Exception as exc:
+        print(f"Warning: heartbeat flush failed on exit: {exc}")
+
+
+def start_heartbeat_flusher():
+    with HEARTBEAT_LOCK:
+        if HEARTBEAT_STATE["flusher"] is not None:
+            return
+        flusher = threading.Thread(
+            target=heartbeat_flush_loop, name="heartbeat-flusher", daemon=True
+        )
+        HEARTBEAT_STATE["flusher"] = flusher
+    flusher.start()
+    atexit.register(flush_heartbeats_on_exit)
 
 
 def get_client_ip():
@@ -148,14 +402,19 @@ def build_session_key(ip_address, user_agent):
     return hashlib.sha256(raw).hexdigest()
 
 
+def build_rate_limiter():
+    local_limiter = TokenBucketLimiter(max_keys=RATE_LIMIT_MAX_KEYS)
+    if RATE_LIMIT_BACKEND == "postgres":
+        return PostgresTokenBucketLimiter(get_connection, fallback=local_limiter)
+    return local_limiter
+
+
+RATE_LIMITER = build_rate_limiter()
+
+
 def apply_rate_limit(bucket, max_requests, window_seconds):
-    now = time.time()
-    history = REQUEST_HISTORY[bucket]
-    while history and now - history[0] > window_seconds:
-        history.popleft()
-    if len(history) >= max_requests:
+    if not RATE_LIMITER.allow(bucket, max_requests, window_seconds):
         abort(429)
-    history.append(now)
 
 
 @app.before_request
@@ -186,24 +445,39 @@ def should_build_news():
     return True
 
 
-NEWS_BUILT = False
+def load_build_news_module():
+    module_path = Path(__file__).resolve().parent / "scripts" / "build_news.py"
+    if not module_path.exists():
+        return None
+    spec = importlib.util.spec_from_file_location("build_news", module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module
 
 
-@app.before_request
-def build_news_on_startup():
-    global NEWS_BUILT
-    if NEWS_BUILT or not should_build_news():
-        return None
-    script_path = Path(__file__).resolve().parent / "scripts" / "build_news.py"
-    if not script_path.exists():
-        NEWS_BUILT = True
-        return None
+def build_news_in_background():
     try:
-        subprocess.run([sys.executable, str(script_path)], check=True)
-    except subprocess.CalledProcessError:
-        print("Warning: scripts/build_news.py failed to run on startup.")
-    NEWS_BUILT = True
-    return None
+        build_news = load_build_news_module()
+        if build_news is None or not build_news.NOTEBOOK_PATH.exists():
+            return
+        if build_news.build():
+            print("Rebuilt templates/news.html from lab_notebook.md.")
+    except Exception as exc:
+        print(f"Warning: news build failed; serving the existing news page: {exc}")
+    finally:
+        if app.jinja_env.cache is not None:
+            app.jinja_env.cache.clear()
+
+
+def start_news_build():
+    if not should_build_news():
+        return None
+    thread = threading.Thread(target=build_news_in_background, name="news-build", daemon=True)
+    thread.start()
+    return thread
+
+
+start_news_build()
 
 
 @app.route("/heartbeat", methods=["POST"])
@@ -213,31 +487,55 @@ def heartbeat():
     session_key = build_session_key(ip_address, user_agent)
     user_id = current_user.id if current_user.is_authenticated else None
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        DELETE FROM active_sessions
-        WHERE last_seen_at < (CURRENT_TIMESTAMP - (%s * INTERVAL '1 hour'))
-        """,
-        (ACTIVE_CLEANUP_HOURS,),
-    )
-    cursor.execute(
-        """
-        INSERT INTO active_sessions (session_key, user_id, last_seen_at, user_agent, ip_address)
-        VALUES (%s, %s, CURRENT_TIMESTAMP, %s, %s)
-        ON CONFLICT (session_key)
-        DO UPDATE SET
-            user_id = EXCLUDED.user_id,
-            last_seen_at = EXCLUDED.last_seen_at,
-            user_agent = EXCLUDED.user_agent,
-            ip_address = EXCLUDED.ip_address
-        """,
-        (session_key, user_id, user_agent, ip_address),
-    )
-    conn.commit()
-    conn.close()
-    return ("", 204)
+    with HEARTBEAT_LOCK:
+        HEARTBEAT_BUFFER[session_key] = {
+            "user_id": user_id,
+            "user_agent": user_agent,
+            "ip_address": ip_address,
+            "seen_at": time.monotonic(),
+        }
+    start_heartbeat_flusher()
+    return jsonify({"active_user_count": get_active_user_count()})
+
+
+def record_request_query(fingerprint, duration_ms, rowcount):
+    if not has_request_context():
+        return
+    if "query_log" not in g:
+        g.query_log = []
+    g.query_log.append((fingerprint, duration_ms, rowcount))
+
+
+add_query_listener(record_request_query)
+
+
+@app.after_request
+def summarize_request_queries(response):
+    query_log = g.pop("query_log", [])
+    endpoint = request.endpoint or "unknown"
+    total_ms = sum(duration_ms for _, duration_ms, _ in query_log)
+    with QUERY_STATS_LOCK:
+        endpoint_stats = QUERY_STATS.setdefault(
+            endpoint,
+            {"requests": 0, "queries": 0, "total_ms": 0.0, "max_request_ms": 0.0, "statements": {}},
+        )
+        endpoint_stats["requests"] += 1
+        endpoint_stats["queries"] += len(query_log)
+        endpoint_stats["total_ms"] += total_ms
+        endpoint_stats["max_request_ms"] = max(endpoint_stats["max_request_ms"], total_ms)
+        for fingerprint, duration_ms, rowcount in query_log:
+            statement = endpoint_stats["statements"].setdefault(
+                fingerprint, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0}
+            )
+            statement["calls"] += 1
+            statement["total_ms"] += duration_ms
+            statement["max_ms"] = max(statement["max_ms"], duration_ms)
+            statement["rows"] += max(rowcount or 0, 0)
+    if app.debug:
+        response.headers["Server-Timing"] = (
+            f'db;dur={total_ms:.1f};desc="{len(query_log)} queries"'
+        )
+    return response
 
 
 @app.after_request
@@ -264,8 +562,268 @@ def add_security_headers(response):
     return response
 
 
+@app.after_request
+def compress_response(response):
+    if (
+        response.direct_passthrough
+        or response.status_code != 200
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    response.set_data(compress_body(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    etag, is_weak = response.get_etag()
+    if etag and not is_weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def load_static_manifest():
+    try:
+        return json.loads(STATIC_MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+STATIC_MANIFEST = load_static_manifest()
+
+
+def build_deploy_version():
+    # news.html is regenerated at runtime, so it is left out to keep every worker's hash equal.
+    digest = hashlib.sha256(APP_VERSION.encode("utf-8"))
+    digest.update(json.dumps(STATIC_MANIFEST, sort_keys=True).encode("utf-8"))
+    for path in sorted(TEMPLATES_DIR.glob("*.html")):
+        if path.name != "news.html":
+            digest.update(path.name.encode("utf-8"))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+DEPLOY_VERSION = build_deploy_version()
+PROCESS_STARTED_AT = datetime.now().astimezone().replace(microsecond=0)
+
+
+@app.template_global()
+def asset_url(filename):
+    return url_for("static", filename=STATIC_MANIFEST.get(filename, filename))
+
+
+@app.route("/static/dist/<path:filename>")
+def fingerprinted_static(filename):
+    mimetype = mimetypes.guess_type(filename)[0]
+    served_name = filename
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is not None:
+        suffix = ".br" if encoding == "br" else ".gz"
+        if (STATIC_DIST_DIR / f"{filename}{suffix}").is_file():
+            served_name = f"{filename}{suffix}"
+        else:
+            encoding = None
+    response = send_from_directory(STATIC_DIST_DIR, served_name, mimetype=mimetype)
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Cache-Control"] = f"public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def get_data_versions():
+    if "data_versions" not in g:
+        cursor = get_db().cursor()
+        cursor.execute("SELECT name, version, updated_at FROM data_versions")
+        g.data_versions = {row["name"]: row for row in cursor.fetchall()}
+    return g.data_versions
+
+
+def build_data_version_token(tables):
+    versions = get_data_versions()
+    parts = []
+    for table in tables:
+        row = versions.get(table)
+        parts.append(f"{table}:{row['version'] if row else 0}")
+    return ",".join(parts)
+
+
+def cached_entry_size(entry):
+    return len(entry["body"]) + sum(len(body) for body in entry["encoded"].values())
+
+
+def trim_response_cache():
+    while RESPONSE_CACHE_STATE["bytes"] > RESPONSE_CACHE_MAX_BYTES:
+        _, evicted = RESPONSE_CACHE.popitem(last=False)
+        RESPONSE_CACHE_STATE["bytes"] -= cached_entry_size(evicted)
+
+
+def get_cached_response(key, token):
+    now = time.monotonic()
+    with RESPONSE_CACHE_LOCK:
+        entry = RESPONSE_CACHE.get(key)
+        if entry is None:
+            return None
+        if entry["token"] != token or now >= entry["expires_at"]:
+            RESPONSE_CACHE_STATE["bytes"] -= cached_entry_size(entry)
+            del RESPONSE_CACHE[key]
+            return None
+        RESPONSE_CACHE.move_to_end(key)
+        return entry
+
+
+def get_cached_encoded_body(key, entry, encoding):
+    with RESPONSE_CACHE_LOCK:
+        encoded = entry["encoded"].get(encoding)
+    if encoded is not None:
+        return encoded
+    encoded = compress_body(entry["body"], encoding)
+    with RESPONSE_CACHE_LOCK:
+        if RESPONSE_CACHE.get(key) is entry and encoding not in entry["encoded"]:
+            entry["encoded"][encoding] = encoded
+            RESPONSE_CACHE_STATE["bytes"] += len(encoded)
+            trim_response_cache()
+    return encoded
+
+
+def store_cached_response(key, token, ttl_seconds, response):
+    body = response.get_data()
+    if len(body) > RESPONSE_CACHE_MAX_BYTES // 4:
+        return
+    entry = {
+        "token": token,
+        "expires_at": time.monotonic() + ttl_seconds,
+        "body": body,
+        "encoded": {},
+        "status": response.status_code,
+        "mimetype": response.mimetype,
+    }
+    with RESPONSE_CACHE_LOCK:
+        previous = RESPONSE_CACHE.pop(key, None)
+        if previous is not None:
+            RESPONSE_CACHE_STATE["bytes"] -= cached_entry_size(previous)
+        RESPONSE_CACHE[key] = entry
+        RESPONSE_CACHE_STATE["bytes"] += len(body)
+        trim_response_cache()
+
+
+def build_cached_response(key, entry):
+    body = entry["body"]
+    compressible = entry["mimetype"] in COMPRESSIBLE_MIMETYPES
+    encoding = None
+    if compressible and len(body) >= COMPRESS_MIN_BYTES:
+        encoding = choose_encoding(request.accept_encodings)
+    if encoding is not None:
+        body = get_cached_encoded_body(key, entry, encoding)
+    response = Response(body, status=entry["status"], mimetype=entry["mimetype"])
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    if compressible:
+        response.vary.add("Accept-Encoding")
+    return response
+
+
+def cached_page(ttl_seconds, tables):
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            if (
+                not RESPONSE_CACHE_ENABLED
+                or request.method != "GET"
+                or current_user.is_authenticated
+            ):
+                return view_func(*args, **kwargs)
+            g.shared_page = True
+            token = build_data_version_token(tables)
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            entry = get_cached_response(key, token)
+            if entry is not None:
+                response = build_cached_response(key, entry)
+                response.headers["X-Cache"] = "HIT"
+                return response
+            response = make_response(view_func(*args, **kwargs))
+            if response.status_code == 200:
+                store_cached_response(key, token, ttl_seconds, response)
+            response.headers["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def build_validators(tables):
+    versions = get_data_versions()
+    user_key = (
+        f"user:{current_user.id}:{current_user.team_id}"
+        if current_user.is_authenticated
+        else "anonymous"
+    )
+    today = date.today()
+    raw = "|".join(
+        [
+            request.full_path,
+            DEPLOY_VERSION,
+            build_data_version_token(tables),
+            user_key,
+            today.isoformat(),
+        ]
+    )
+    etag = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+    last_modified = max(datetime.combine(today, dt_time.min).astimezone(), PROCESS_STARTED_AT)
+    for table in tables:
+        row = versions.get(table)
+        if row and row["updated_at"] and row["updated_at"] > last_modified:
+            last_modified = row["updated_at"]
+    return etag, last_modified.replace(microsecond=0)
+
+
+def is_not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def set_validators(response, etag, last_modified, max_age=0):
+    # Weak and varied on Accept-Encoding so a 304 matches whichever encoding the 200 used.
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    scope = "private" if current_user.is_authenticated else None
+    freshness = f"max-age={max_age}" if max_age else "no-cache"
+    response.headers["Cache-Control"] = ", ".join(filter(None, [scope, freshness]))
+    response.vary.add("Cookie")
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def conditional_page(tables, max_age=0):
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET":
+                return view_func(*args, **kwargs)
+            g.shared_page = True
+            etag, last_modified = build_validators(tables)
+            if is_not_modified(etag, last_modified):
+                return set_validators(Response(status=304), etag, last_modified, max_age)
+            response = make_response(view_func(*args, **kwargs))
+            if response.status_code == 200:
+                set_validators(response, etag, last_modified, max_age)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
 def load_roster():
-    conn = get_connection()
+    conn = get_db()
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -283,7 +841,6 @@ def load_roster():
         ORDER BY t.name IS NULL, t.name, p.name
     """)
     rows = cursor.fetchall()
-    conn.close()
 
     grouped = defaultdict(list)
     for row in rows:
@@ -304,19 +861,51 @@ def load_roster():
     return teams, total_players
 
 
+@app.template_filter("display_date")
+def display_date(value):
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.strftime("%b %-d, %Y")
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%b %-d, %Y")
+    except (TypeError, ValueError):
+        return value
+
+
+def iso_date(value):
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
 def load_team_stats(team_id=None):
-    conn = get_connection()
+    conn = get_db()
     cursor = conn.cursor()
 
     cursor.execute("SELECT id, name FROM teams ORDER BY name")
     teams = cursor.fetchall()
     if not teams:
-        conn.close()
-        return [], None, [], None
+        return [], None, None, [], None, []
 
     selected_team_id = team_id or teams[0]["id"]
-    params = [selected_team_id]
-    date_filter = ""
+    cursor.execute(
+        """
+        SELECT p.mlb_id AS player_id, p.name AS player_name
+        FROM team_player tp
+        JOIN players p ON p.mlb_id = tp.player_mlb_id
+        WHERE tp.team_id = %s
+        ORDER BY p.name
+        """,
+        (selected_team_id,),
+    )
+    player_totals = [
+        {**row, "total_offense": 0, "total_pitching": 0} for row in cursor.fetchall()
+    ]
+    player_totals_by_id = {row["player_id"]: row for row in player_totals}
+
     cursor.execute(
         """
         SELECT
@@ -329,58 +918,25 @@ def load_team_stats(team_id=None):
         JOIN players p ON p.mlb_id = s.player_mlb_id
         WHERE s.team_id = %s
           AND (COALESCE(s.offense, 0) != 0 OR COALESCE(s.pitching, 0) != 0)
-        """ + date_filter + """
         ORDER BY s.date DESC, p.name
         """,
-        params,
-    )
-    rows = cursor.fetchall()
-    for row in rows:
-        value = row["date"]
-        if isinstance(value, datetime):
-            row["date"] = value.date().strftime("%b %-d, %Y")
-        elif isinstance(value, date):
-            row["date"] = value.strftime("%b %-d, %Y")
-        else:
-            try:
-                row["date"] = datetime.strptime(value, "%Y-%m-%d").strftime("%b %-d, %Y")
-            except (TypeError, ValueError):
-                row["date"] = value
-
-    cursor.execute(
-        """
-        SELECT
-            p.mlb_id AS player_id,
-            p.name AS player_name,
-            COALESCE(SUM(s.offense), 0) AS total_offense,
-            COALESCE(SUM(s.pitching), 0) AS total_pitching
-        FROM team_player tp
-        JOIN players p ON p.mlb_id = tp.player_mlb_id
-        LEFT JOIN stats s
-            ON s.player_mlb_id = p.mlb_id AND s.team_id = tp.team_id
-        WHERE tp.team_id = %s
-        GROUP BY p.mlb_id
-        ORDER BY p.name
-        """,
         (selected_team_id,),
     )
-    player_totals = cursor.fetchall()
-
-    totals_params = [selected_team_id]
-    totals_filter = ""
-    cursor.execute(
-        """
-        SELECT
-            SUM(offense) AS total_offense,
-            SUM(pitching) AS total_pitching
-        FROM stats
-        WHERE team_id = %s
-        """ + totals_filter,
-        totals_params,
-    )
-    totals = cursor.fetchone()
+    rows = []
+    totals = {"total_offense": None, "total_pitching": None}
+    for row in cursor.fetchall():
+        offense = row["offense"]
+        pitching = row["pitching"]
+        if offense is not None:
+            totals["total_offense"] = (totals["total_offense"] or 0) + offense
+        if pitching is not None:
+            totals["total_pitching"] = (totals["total_pitching"] or 0) + pitching
+        player = player_totals_by_id.get(row["player_id"])
+        if player is not None:
+            player["total_offense"] += offense or 0
+            player["total_pitching"] += pitching or 0
+        rows.append(row)
 
-    conn.close()
     selected_team_name = None
     for team in teams:
         if team["id"] == selected_team_id:
@@ -390,135 +946,37 @@ def load_team_stats(team_id=None):
     return teams, selected_team_id, selected_team_name, rows, totals, player_totals
 
 
-def load_team_roster_history(team_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    history = []
+ROSTER_EVENT_LABELS = {"add": "Added", "drop": "Dropped"}
 
-    cursor.execute(
-        """
-        SELECT MIN(submitted) AS first_submitted
-        FROM roster_move_requests
-        WHERE team_id = %s
-        """,
-        (team_id,),
-    )
-    first_submitted = cursor.fetchone()["first_submitted"]
-
-    if first_submitted:
-        cursor.execute(
-            """
-            SELECT
-                a.datetime AS event_time,
-                p.name AS player_name
-            FROM audit a
-            JOIN players p
-              ON p.mlb_id = (a.new_value::json->>'player_mlb_id')::int
-            WHERE a.table_name = 'team_player'
-              AND a.operation = 'INSERT'
-              AND (a.new_value::json->>'team_id')::int = %s
-              AND a.datetime < %s
-            """,
-            (team_id, first_submitted),
-        )
-    else:
-        cursor.execute(
-            """
-            SELECT
-                a.datetime AS event_time,
-                p.name AS player_name
-            FROM audit a
-            JOIN players p
-              ON p.mlb_id = (a.new_value::json->>'player_mlb_id')::int
-            WHERE a.table_name = 'team_player'
-              AND a.operation = 'INSERT'
-              AND (a.new_value::json->>'team_id')::int = %s
-            """,
-            (team_id,),
-        )
-    for row in cursor.fetchall():
-        history.append(
-            {
-                "event_time": row["event_time"],
-                "player_name": row["player_name"],
-                "action": "Added",
-                "reason": "Purchased at auction",
-            }
-        )
-
-    cursor.execute(
-        """
-        SELECT r.submitted AS event_time,
-               rmp.action,
-               p.name AS player_name
-        FROM roster_move_requests r
-        JOIN roster_move_request_players rmp ON rmp.roster_move_request_id = r.id
-        JOIN players p ON p.mlb_id = rmp.player_mlb_id
-        WHERE r.team_id = %s AND r.status = 'processed'
-        """,
-        (team_id,),
-    )
-    for row in cursor.fetchall():
-        history.append(
-            {
-                "event_time": row["event_time"],
-                "player_name": row["player_name"],
-                "action": "Added" if row["action"] == "add" else "Dropped",
-                "reason": "Roster move processed",
-            }
-        )
 
+def load_team_roster_history(team_id):
+    conn = get_db()
+    cursor = conn.cursor()
     cursor.execute(
         """
-        SELECT a.deactivated_at AS event_time,
-               p.name AS player_name
-        FROM alumni a
-        JOIN players p ON p.mlb_id = a.player_mlb_id
-        WHERE a.team_id = %s
+        SELECT e.event_time, e.action, e.reason, p.name AS player_name
+        FROM roster_events e
+        JOIN players p ON p.mlb_id = e.player_mlb_id
+        WHERE e.team_id = %s
+        ORDER BY e.event_time DESC, e.id DESC
         """,
         (team_id,),
     )
+    history = []
     for row in cursor.fetchall():
         history.append(
             {
                 "event_time": row["event_time"],
                 "player_name": row["player_name"],
-                "action": "Dropped",
-                "reason": "Removed from MLB 40-man",
+                "action": ROSTER_EVENT_LABELS.get(row["action"], row["action"]),
+                "reason": row["reason"],
             }
         )
-
-    conn.close()
-
-    def to_sort_key(value):
-        if isinstance(value, datetime):
-            return value
-        if isinstance(value, date):
-            return datetime.combine(value, datetime.min.time())
-        try:
-            return datetime.strptime(value, "%Y-%m-%d")
-        except (TypeError, ValueError):
-            return datetime.min
-
-    history.sort(key=lambda item: to_sort_key(item["event_time"]), reverse=True)
-
-    for entry in history:
-        value = entry["event_time"]
-        if isinstance(value, datetime):
-            entry["event_time"] = value.date().strftime("%b %-d, %Y")
-        elif isinstance(value, date):
-            entry["event_time"] = value.strftime("%b %-d, %Y")
-        else:
-            try:
-                entry["event_time"] = datetime.strptime(value, "%Y-%m-%d").strftime(
-                    "%b %-d, %Y"
-                )
-            except (TypeError, ValueError):
-                entry["event_time"] = value
     return history
 
 
 @app.route("/")
+@cached_page(120, ("players", "team_player", "teams"))
 def roster_view():
     teams, total_players = load_roster()
     return render_template(
@@ -530,6 +988,17 @@ def roster_view():
 
 
 @app.route("/team")
+@conditional_page(
+    (
+        "stats",
+        "players",
+        "team_player",
+        "teams",
+        "roster_move_requests",
+        "roster_move_request_players",
+        "alumni",
+    )
+)
 def team_stats():
     team_id = request.args.get("team_id", type=int)
     if team_id is not None and team_id <= 0:
@@ -560,24 +1029,20 @@ def team_stats():
 
 
 def load_leaderboard(week_start=None):
-    conn = get_connection()
+    conn = get_db()
     cursor = conn.cursor()
 
-    cursor.execute("SELECT DISTINCT date FROM stats ORDER BY date DESC")
-    dates = []
-    for row in cursor.fetchall():
-        value = row["date"]
-        if isinstance(value, datetime):
-            dates.append(value.date())
-            continue
-        if isinstance(value, date):
-            dates.append(value)
-            continue
-        try:
-            dates.append(datetime.strptime(value, "%Y-%m-%d").date())
-        except (TypeError, ValueError):
-            continue
-    week_starts = sorted({date - timedelta(days=date.weekday()) for date in dates}, reverse=True)
+    cursor.execute(
+        """
+        SELECT week_start, is_scored
+        FROM season_weeks
+        WHERE has_stats
+        ORDER BY week_start DESC
+        """
+    )
+    season_weeks = cursor.fetchall()
+    week_starts = [row["week_start"] for row in season_weeks]
+    scored_weeks = {row["week_start"] for row in season_weeks if row["is_scored"]}
 
     selected_week_start = None
     if week_start:
@@ -590,76 +1055,51 @@ def load_leaderboard(week_start=None):
     if selected_week_start is None and week_starts:
         selected_week_start = week_starts[0]
 
-
-    params = []
-    join_filter = ""
     selected_week_end = None
     if selected_week_start:
         selected_week_end = selected_week_start + timedelta(days=6)
-        join_filter = "AND s.date BETWEEN %s AND %s"
-        params.extend([selected_week_start.isoformat(), selected_week_end.isoformat()])
 
     cursor.execute(
-        f"""
-        SELECT
-            t.id AS team_id,
-            t.name AS team_name,
-            COALESCE(SUM(s.offense), 0) AS total_offense
-        FROM teams t
-        LEFT JOIN stats s
-            ON s.team_id = t.id
-            {join_filter}
-        GROUP BY t.id
-        ORDER BY total_offense DESC, t.name
-        """,
-        params,
-    )
-    offense_rows = cursor.fetchall()
-
-    cursor.execute(
-        f"""
+        """
         SELECT
             t.id AS team_id,
             t.name AS team_name,
-            COALESCE(SUM(s.pitching), 0) AS total_pitching
+            COALESCE(w.offense, 0) AS total_offense,
+            COALESCE(w.pitching, 0) AS total_pitching
         FROM teams t
-        LEFT JOIN stats s
-            ON s.team_id = t.id
-            {join_filter}
-        GROUP BY t.id
-        ORDER BY total_pitching DESC, t.name
+        LEFT JOIN weekly_team_totals w
+            ON w.team_id = t.id AND w.week_start = %s
         """,
-        params,
+        (selected_week_start,),
     )
-    pitching_rows = cursor.fetchall()
+    team_rows = cursor.fetchall()
+    offense_rows = sorted(team_rows, key=lambda row: (-row["total_offense"], row["team_name"]))
+    pitching_rows = sorted(team_rows, key=lambda row: (-row["total_pitching"], row["team_name"]))
 
     offense_points = {}
     pitching_points = {}
-    if selected_week_end and selected_week_end < date.today():
+    if (
+        selected_week_end
+        and selected_week_end < date.today()
+        and selected_week_start in scored_weeks
+    ):
         cursor.execute(
             """
-            SELECT team_id, value
+            SELECT team_id, type, value
             FROM points
-            WHERE date = %s AND type = 'offense'
+            WHERE date = %s
             """,
             (selected_week_end.isoformat(),),
         )
-        offense_points = {row["team_id"]: row["value"] for row in cursor.fetchall()}
-
-        cursor.execute(
-            """
-            SELECT team_id, value
-            FROM points
-            WHERE date = %s AND type = 'defense'
-            """,
-            (selected_week_end.isoformat(),),
-        )
-        pitching_points = {row["team_id"]: row["value"] for row in cursor.fetchall()}
+        for row in cursor.fetchall():
+            if row["type"] == "offense":
+                offense_points[row["team_id"]] = row["value"]
+            elif row["type"] == "defense":
+                pitching_points[row["team_id"]] = row["value"]
 
     show_offense_points = any(value for value in offense_points.values())
     show_pitching_points = any(value for value in pitching_points.values())
 
-    conn.close()
     return (
         offense_rows,
         pitching_rows,
@@ -673,6 +1113,8 @@ def load_leaderboard(week_start=None):
 
 
 @app.route("/week")
+@conditional_page(("stats", "points", "teams"))
+@cached_page(60, ("stats", "points", "teams"))
 def week_view():
     week_start = request.args.get("week_start")
     (
@@ -685,8 +1127,6 @@ def week_view():
         show_offense_points,
         show_pitching_points,
     ) = load_leaderboard(week_start=week_start)
-    if week_start and selected_week_start is None and week_starts:
-        abort(400)
     return render_template(
         "leaderboard.html",
         offense_rows=offense_rows,
@@ -702,7 +1142,7 @@ def week_view():
 
 
 def load_player_details(player_id):
-    conn = get_connection()
+    conn = get_db()
     cursor = conn.cursor()
 
     cursor.execute(
@@ -723,28 +1163,18 @@ def load_player_details(player_id):
     )
     player = cursor.fetchone()
     if not player:
-        conn.close()
-        return None, [], None
+        return None, [], None, False, False
     position_name = player.get("position_name") or ""
     player["display_position"] = "Pitcher" if position_name == "Pitcher" else "Hitter"
 
     cursor.execute(
-        "SELECT MIN(date) AS first_date FROM stats WHERE player_mlb_id = %s",
+        "SELECT first_date FROM player_stat_ranges WHERE player_mlb_id = %s",
         (player_id,),
     )
-    first_row = cursor.fetchone()
+    range_row = cursor.fetchone()
     year = None
-    if first_row and first_row["first_date"]:
-        value = first_row["first_date"]
-        if isinstance(value, datetime):
-            year = value.year
-        elif isinstance(value, date):
-            year = value.year
-        else:
-            try:
-                year = datetime.strptime(value, "%Y-%m-%d").year
-            except (TypeError, ValueError):
-                year = None
+    if range_row and range_row["first_date"]:
+        year = range_row["first_date"].year
 
     stats_rows = []
     show_offense = False
@@ -754,32 +1184,21 @@ def load_player_details(player_id):
             """
             SELECT date, offense, pitching
             FROM stats
-            WHERE player_mlb_id = %s AND date::text LIKE %s
+            WHERE player_mlb_id = %s AND date >= %s AND date < %s
               AND (COALESCE(offense, 0) != 0 OR COALESCE(pitching, 0) != 0)
             ORDER BY date DESC
             """,
-            (player_id, f"{year}-%"),
+            (player_id, datetime(year, 1, 1), datetime(year + 1, 1, 1)),
         )
         stats_rows = cursor.fetchall()
         show_offense = any((row.get("offense") or 0) != 0 for row in stats_rows)
         show_pitching = any((row.get("pitching") or 0) != 0 for row in stats_rows)
-        for row in stats_rows:
-            value = row["date"]
-            if isinstance(value, datetime):
-                row["date"] = value.date().strftime("%b %-d, %Y")
-            elif isinstance(value, date):
-                row["date"] = value.strftime("%b %-d, %Y")
-            else:
-                try:
-                    row["date"] = datetime.strptime(value, "%Y-%m-%d").strftime("%b %-d, %Y")
-                except (TypeError, ValueError):
-                    row["date"] = value
 
-    conn.close()
     return player, stats_rows, year, show_offense, show_pitching
 
 
 @app.route("/player")
+@cached_page(300, ("players", "team_player", "teams", "stats"))
 def player_view():
     player_id = request.args.get("player_id", type=int)
     if player_id is not None and player_id <= 0:
@@ -806,7 +1225,7 @@ def player_view():
 
 
 def load_season_totals():
-    conn = get_connection()
+    conn = get_db()
     cursor = conn.cursor()
 
     cursor.execute(
@@ -824,18 +1243,175 @@ def load_season_totals():
         """
     )
     rows = cursor.fetchall()
-    conn.close()
     return rows
 
 
 @app.route("/season")
+@conditional_page(("points", "teams"))
+@cached_page(120, ("points", "teams"))
 def season_view():
     rows = load_season_totals()
     return render_template("season.html", rows=rows)
 
 
+API_MAX_AGE_SECONDS = 30
+
+
+@app.route("/api/season")
+@conditional_page(("points", "teams"), max_age=API_MAX_AGE_SECONDS)
+@cached_page(120, ("points", "teams"))
+def api_season():
+    rows = load_season_totals()
+    return jsonify(
+        {
+            "teams": [
+                {
+                    "id": row["team_id"],
+                    "name": row["team_name"],
+                    "offense": row["offense_points"],
+                    "pitching": row["pitching_points"],
+                    "total": row["total_points"],
+                }
+                for row in rows
+            ]
+        }
+    )
+
+
+@app.route("/api/week")
+@conditional_page(("stats", "points", "teams"), max_age=API_MAX_AGE_SECONDS)
+@cached_page(60, ("stats", "points", "teams"))
+def api_week():
+    week_start = request.args.get("week_start")
+    (
+        offense_rows,
+        pitching_rows,
+        week_starts,
+        selected_week_start,
+        offense_points,
+        pitching_points,
+        show_offense_points,
+        show_pitching_points,
+    ) = load_leaderboard(week_start=week_start)
+
+    def team_rows(rows, total_key, points, show_points):
+        payload = []
+        for row in rows:
+            item = {"id": row["team_id"], "name": row["team_name"], "total": row[total_key] or 0}
+            if show_points:
+                item["points"] = points.get(row["team_id"])
+            payload.append(item)
+        return payload
+
+    return jsonify(
+        {
+            "week_start": selected_week_start.isoformat() if selected_week_start else None,
+            "weeks": [value.isoformat() for value in week_starts],
+            "offense": team_rows(offense_rows, "total_offense", offense_points, show_offense_points),
+            "pitching": team_rows(pitching_rows, "total_pitching", pitching_points, show_pitching_points),
+        }
+    )
+
+
+@app.route("/api/team/<int:team_id>")
+@conditional_page(
+    (
+        "stats",
+        "players",
+        "team_player",
+        "teams",
+        "roster_move_requests",
+        "roster_move_request_players",
+        "alumni",
+    ),
+    max_age=API_MAX_AGE_SECONDS,
+)
+@cached_page(
+    120,
+    (
+        "stats",
+        "players",
+        "team_player",
+        "teams",
+        "roster_move_requests",
+        "roster_move_request_players",
+        "alumni",
+    ),
+)
+def api_team(team_id):
+    if team_id <= 0:
+        abort(400)
+    _, selected_team_id, selected_team_name, rows, totals, player_totals = load_team_stats(
+        team_id=team_id
+    )
+    if selected_team_name is None:
+        abort(404)
+    return jsonify(
+        {
+            "id": selected_team_id,
+            "name": selected_team_name,
+            "offense": totals["total_offense"] or 0,
+            "pitching": totals["total_pitching"] or 0,
+            "players": [
+                {
+                    "id": row["player_id"],
+                    "name": row["player_name"],
+                    "offense": row["total_offense"],
+                    "pitching": row["total_pitching"],
+                }
+                for row in player_totals
+            ],
+            "daily": [
+                {
+                    "date": iso_date(row["date"]),
+                    "player_id": row["player_id"],
+                    "offense": row["offense"] or 0,
+                    "pitching": row["pitching"] or 0,
+                }
+                for row in rows
+            ],
+            "roster_history": [
+                {**entry, "event_time": iso_date(entry["event_time"])}
+                for entry in load_team_roster_history(selected_team_id)
+            ],
+        }
+    )
+
+
+@app.route("/api/player/<int:player_id>")
+@conditional_page(("players", "team_player", "teams", "stats"), max_age=API_MAX_AGE_SECONDS)
+@cached_page(300, ("players", "team_player", "teams", "stats"))
+def api_player(player_id):
+    if player_id <= 0:
+        abort(400)
+    player, stats_rows, year, _, _ = load_player_details(player_id)
+    if player is None:
+        abort(404)
+    return jsonify(
+        {
+            "id": player["mlb_id"],
+            "name": player["name"],
+            "position": player["display_position"],
+            "team": (
+                {"id": player["team_id"], "name": player["team_name"]}
+                if player["team_id"]
+                else None
+            ),
+            "year": year,
+            "stats": [
+                {
+                    "date": iso_date(row["date"]),
+                    "offense": row["offense"] or 0,
+                    "pitching": row["pitching"] or 0,
+                }
+                for row in stats_rows
+            ],
+        }
+    )
+
+
 def load_available_players():
-    conn = get_connection()
+    conn = get_db()
     cursor = conn.cursor()
     cursor.execute(
         """
@@ -854,53 +1430,188 @@ def load_available_players():
     for row in rows:
         position_name = row["position_name"] or ""
         row["display_position"] = "Pitcher" if position_name == "Pitcher" else "Hitter"
-    conn.close()
     return rows
 
 
 @app.route("/available")
+@cached_page(60, ("players", "team_player"))
 def available_view():
     rows = load_available_players()
     return render_template("available.html", rows=rows)
 
 
-def load_audit(page, page_size=50):
-    conn = get_connection()
-    cursor = conn.cursor()
+AUDIT_PAGE_SIZE = 50
+AUDIT_TABLES = (
+    "alumni",
+    "leagues",
+    "mlb_roster_changes",
+    "players",
+    "points",
+    "roster_move_request_players",
+    "roster_move_requests",
+    "stats",
+    "team_player",
+    "teams",
+    "user_accounts",
+)
+AUDIT_OPERATIONS = ("INSERT", "UPDATE", "DELETE")
+
 
+def estimate_audit_rows(cursor):
+    cursor.execute(
+        "SELECT reltuples::bigint AS estimate FROM pg_class WHERE oid = 'audit'::regclass"
+    )
+    row = cursor.fetchone()
+    if row and row["estimate"] >= 0:
+        return row["estimate"]
     cursor.execute("SELECT COUNT(*) AS count FROM audit")
-    total = cursor.fetchone()["count"]
+    return cursor.fetchone()["count"]
 
-    offset = (page - 1) * page_size
+
+def parse_audit_cursor(args, prefix):
+    value = args.get(prefix)
+    row_id = args.get(f"{prefix}_id", type=int)
+    if value is None and row_id is None:
+        return None
+    if value is None or row_id is None:
+        abort(400)
+    try:
+        return datetime.fromisoformat(value), row_id
+    except ValueError:
+        abort(400)
+
+
+def parse_audit_filters(args):
+    filters = {}
+    table_name = (args.get("table") or "").strip()
+    if table_name:
+        if table_name not in AUDIT_TABLES:
+            abort(400)
+        filters["table"] = table_name
+    operation = (args.get("operation") or "").strip().upper()
+    if operation:
+        if operation not in AUDIT_OPERATIONS:
+            abort(400)
+        filters["operation"] = operation
+    user_email = (args.get("user") or "").strip().lower()
+    if user_email:
+        filters["user"] = user_email
+    for key in ("start", "end"):
+        value = (args.get(key) or "").strip()
+        if value:
+            try:
+                date.fromisoformat(value)
+            except ValueError:
+                abort(400)
+            filters[key] = value
+    return filters
+
+
+def build_audit_where(cursor, filters):
+    clauses = []
+    params = []
+    if "table" in filters:
+        clauses.append("table_name = %s")
+        params.append(filters["table"])
+    if "user" in filters:
+        cursor.execute(
+            "SELECT id FROM user_accounts WHERE email = %s",
+            (filters["user"],),
+        )
+        user_row = cursor.fetchone()
+        if not user_row:
+            return None
+        clauses.append("user_id = %s")
+        params.append(user_row["id"])
+    if "operation" in filters:
+        clauses.append("operation = %s")
+        params.append(filters["operation"])
+    if "start" in filters:
+        clauses.append("datetime >= %s")
+        params.append(datetime.combine(date.fromisoformat(filters["start"]), dt_time.min))
+    if "end" in filters:
+        clauses.append("datetime < %s")
+        params.append(
+            datetime.combine(date.fromisoformat(filters["end"]) + timedelta(days=1), dt_time.min)
+        )
+    return clauses, params
+
+
+def load_audit(before=None, after=None, filters=None, page_size=AUDIT_PAGE_SIZE):
+    conn = get_db()
+    cursor = conn.cursor()
+
+    filters = filters or {}
+    where = build_audit_where(cursor, filters)
+    if where is None:
+        return [], False, False, 1
+    clauses, params = where
+
+    if filters:
+        total_pages = None
+    else:
+        total = estimate_audit_rows(cursor)
+        total_pages = max(1, (total + page_size - 1) // page_size)
+
+    if after is not None:
+        clauses.append("(datetime, id) > (%s, %s)")
+        params.extend(after)
+        order = "datetime, id"
+    else:
+        if before is not None:
+            clauses.append("(datetime, id) < (%s, %s)")
+            params.extend(before)
+        order = "datetime DESC, id DESC"
+    where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
     cursor.execute(
-        """
-        SELECT datetime, table_name, operation, old_value, new_value
+        f"""
+        SELECT id, datetime, table_name, operation, old_value, new_value
         FROM audit
-        ORDER BY datetime DESC, id DESC
-        LIMIT %s OFFSET %s
+        {where_sql}
+        ORDER BY {order}
+        LIMIT %s
         """,
-        (page_size, offset),
+        (*params, page_size + 1),
     )
     rows = cursor.fetchall()
-    conn.close()
-
-    total_pages = max(1, (total + page_size - 1) // page_size)
-    return rows, total_pages
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if after is not None:
+        return rows[::-1], has_more, True, total_pages
+    return rows, before is not None, has_more, total_pages
 
 
 @app.route("/audit")
 @login_required
 @owner_or_admin_required
 def audit_view():
+    before = parse_audit_cursor(request.args, "before")
+    after = parse_audit_cursor(request.args, "after")
+    if before is not None and after is not None:
+        abort(400)
+    filters = parse_audit_filters(request.args)
     page = request.args.get("page", type=int) or 1
     if page < 1:
         abort(400)
-    rows, total_pages = load_audit(page)
+    if before is None and after is None:
+        page = 1
+    rows, has_prev, has_next, total_pages = load_audit(
+        before=before, after=after, filters=filters
+    )
+    if not has_prev:
+        page = 1
+    if total_pages is not None:
+        total_pages = max(total_pages, page)
     return render_template(
         "audit.html",
         rows=rows,
         page=page,
         total_pages=total_pages,
+        has_prev=has_prev,
+        has_next=has_next,
+        filters=filters,
+        audit_tables=AUDIT_TABLES,
+        audit_operations=AUDIT_OPERATIONS,
     )
 
 
@@ -912,13 +1623,21 @@ def login_view():
         password = request.form.get("password") or ""
         remember = bool(request.form.get("remember"))
         if email and password:
-            conn = get_connection()
+            conn = get_db()
             cursor = conn.cursor()
             cursor.execute(
                 """
-                SELECT id, email, password_hash, role, team_id, is_active
-                FROM user_accounts
-                WHERE email = %s
+                SELECT
+                    ua.id,
+                    ua.email,
+                    ua.password_hash,
+                    ua.role,
+                    ua.team_id,
+                    ua.is_active,
+                    t.name AS team_name
+                FROM user_accounts ua
+                LEFT JOIN teams t ON t.id = ua.team_id
+                WHERE ua.email = %s
                 """,
                 (email,),
             )
@@ -936,18 +1655,10 @@ def login_view():
                     ),
                 )
                 conn.commit()
-            conn.close()
             if row and row["is_active"] and check_password_hash(row["password_hash"], password):
-                login_user(
-                    AuthUser(
-                        row["id"],
-                        row["email"],
-                        row["role"],
-                        row["team_id"],
-                        row["is_active"],
-                    ),
-                    remember=remember,
-                )
+                user = build_auth_user(row)
+                cache_user(user)
+                login_user(user, remember=remember)
                 return redirect(request.args.get("next") or "/")
         error = "Invalid email or password."
     return render_template("login.html", error=error)
@@ -956,6 +1667,7 @@ def login_view():
 @app.route("/logout")
 @login_required
 def logout_view():
+    invalidate_cached_user(current_user.id)
     logout_user()
     return redirect("/")
 
@@ -963,7 +1675,7 @@ def logout_view():
 @app.route("/profile")
 @login_required
 def profile_view():
-    conn = get_connection()
+    conn = get_db()
     cursor = conn.cursor()
     cursor.execute(
         """
@@ -976,7 +1688,6 @@ def profile_view():
         (current_user.id,),
     )
     rows = cursor.fetchall()
-    conn.close()
     for row in rows:
         value = row["logged_in_at"]
         if isinstance(value, datetime):
@@ -1000,17 +1711,16 @@ def roster_move_view():
                 except ValueError:
                     team_id = None
         if not team_id:
-            conn = get_connection()
+            conn = get_db()
             cursor = conn.cursor()
             cursor.execute("SELECT id FROM teams ORDER BY name LIMIT 1")
             row = cursor.fetchone()
-            conn.close()
             team_id = row["id"] if row else None
     else:
         team_id = current_user.team_id
     if not team_id:
         abort(403)
-    conn = get_connection()
+    conn = get_db()
     cursor = conn.cursor()
     cursor.execute(
         """
@@ -1022,7 +1732,6 @@ def roster_move_view():
     )
     team_row = cursor.fetchone()
     if not team_row:
-        conn.close()
         abort(404)
     team_name = team_row["name"]
 
@@ -1155,7 +1864,6 @@ def roster_move_view():
                 conn.rollback()
                 raise
 
-    conn.close()
     return render_template(
         "roster-move.html",
         team_name=team_name,
@@ -1177,7 +1885,7 @@ def pending_roster_moves_view():
         request_id = request.form.get("request_id", type=int)
         if not request_id:
             abort(400)
-        conn = get_connection()
+        conn = get_db()
         cursor = conn.cursor()
         if current_user.role == "owner":
             cursor.execute(
@@ -1198,14 +1906,13 @@ def pending_roster_moves_view():
                 (request_id,),
             )
         conn.commit()
-        conn.close()
     if current_user.role == "owner" and current_user.team_id:
         team_filter = "AND r.team_id = %s"
         params = [current_user.team_id]
     else:
         team_filter = ""
         params = []
-    conn = get_connection()
+    conn = get_db()
     cursor = conn.cursor()
     cursor.execute(
         f"""
@@ -1238,7 +1945,6 @@ def pending_roster_moves_view():
         )
         for row in cursor.fetchall():
             players_by_request.setdefault(row["roster_move_request_id"], []).append(row)
-    conn.close()
 
     for row in requests:
         value = row["submitted"]
@@ -1251,12 +1957,54 @@ def pending_roster_moves_view():
     return render_template("pending-roster-moves.html", requests=requests)
 
 
+@app.route("/query-stats")
+@login_required
+@admin_required
+def query_stats_view():
+    with QUERY_STATS_LOCK:
+        snapshot = {}
+        for endpoint, stats in QUERY_STATS.items():
+            statements = sorted(
+                (
+                    {"statement": fingerprint, **values}
+                    for fingerprint, values in stats["statements"].items()
+                ),
+                key=lambda item: item["total_ms"],
+                reverse=True,
+            )
+            snapshot[endpoint] = {
+                "requests": stats["requests"],
+                "queries": stats["queries"],
+                "avg_queries": round(stats["queries"] / stats["requests"], 2),
+                "avg_ms": round(stats["total_ms"] / stats["requests"], 2),
+                "max_request_ms": round(stats["max_request_ms"], 2),
+                "statements": statements,
+            }
+    return jsonify(snapshot)
+
+
+def load_rules_html():
+    try:
+        stat = RULES_PATH.stat()
+    except FileNotFoundError:
+        return None
+    key = (stat.st_mtime_ns, stat.st_size)
+    with RULES_CACHE_LOCK:
+        if RULES_CACHE["key"] == key:
+            return RULES_CACHE["html"]
+    rules_text = RULES_PATH.read_text(encoding="utf-8")
+    rules_html = markdown.markdown(rules_text, extensions=["extra", "sane_lists"])
+    with RULES_CACHE_LOCK:
+        RULES_CACHE["key"] = key
+        RULES_CACHE["html"] = rules_html
+    return rules_html
+
+
 @app.route("/rules")
 def rules_view():
-    if not RULES_PATH.exists():
+    rules_html = load_rules_html()
+    if rules_html is None:
         abort(404)
-    rules_text = RULES_PATH.read_text(encoding="utf-8")
-    rules_html = markdown.markdown(rules_text, extensions=["extra", "sane_lists"])
     return render_template("rules.html", rules_html=rules_html)
 
 
@@ -0,0 +1,39 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_MIMETYPES = {
+    "text/html",
+    "text/css",
+    "text/plain",
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+}
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def supported_encodings():
+    if brotli is not None:
+        return ("br", "gzip")
+    return ("gzip",)
+
+
+def choose_encoding(accept_encodings, available=None):
+    for encoding in available or supported_encodings():
+        if accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+
+def compress_body(body, encoding, level=None):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY if level is None else level)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL if level is None else level, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
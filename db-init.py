@@ -155,6 +155,13 @@ CREATE TABLE IF NOT EXISTS audit (
     row_hash TEXT NOT NULL
 );
 
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_buckets (
+    bucket_key TEXT PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    allowed BOOLEAN NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL
+);
+
 CREATE EXTENSION IF NOT EXISTS pgcrypto;
 
 CREATE INDEX IF NOT EXISTS idx_audit_datetime
@@ -171,6 +178,14 @@ CREATE INDEX IF NOT EXISTS idx_user_login_history_user_time
     ON user_login_history(user_id, logged_in_at DESC);
 CREATE INDEX IF NOT EXISTS idx_active_sessions_last_seen
     ON active_sessions(last_seen_at);
+CREATE INDEX IF NOT EXISTS idx_rate_limit_buckets_updated
+    ON rate_limit_buckets(updated_at);
+CREATE INDEX IF NOT EXISTS idx_stats_team_date
+    ON stats(team_id, date);
+CREATE INDEX IF NOT EXISTS idx_stats_player_date
+    ON stats(player_mlb_id, date);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_points_team_date_type
+    ON points(team_id, date, type);
 CREATE INDEX IF NOT EXISTS idx_team_player_mlb_id
     ON team_player(player_mlb_id);
 CREATE INDEX IF NOT EXISTS idx_mlb_roster_changes_date
@@ -421,6 +436,479 @@ AFTER INSERT ON mlb_roster_changes
 FOR EACH ROW EXECUTE FUNCTION audit_insert_mlb_roster_changes();
 """
 
+DATA_VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS data_versions (
+    name TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    txid BIGINT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION bump_data_version() RETURNS trigger AS $$
+BEGIN
+  INSERT INTO data_versions (name, version, txid, updated_at)
+  VALUES (TG_TABLE_NAME, 1, txid_current(), clock_timestamp())
+  ON CONFLICT (name) DO UPDATE SET
+    version = data_versions.version + 1,
+    txid = EXCLUDED.txid,
+    updated_at = EXCLUDED.updated_at
+  WHERE data_versions.txid IS DISTINCT FROM EXCLUDED.txid;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+  target TEXT;
+BEGIN
+  FOREACH target IN ARRAY ARRAY[
+    'players',
+    'teams',
+    'team_player',
+    'stats',
+    'points',
+    'alumni',
+    'roster_move_requests',
+    'roster_move_request_players',
+    'mlb_roster_changes'
+  ]
+  LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS data_version_%s_aiudt ON %I', target, target);
+    EXECUTE format(
+      'CREATE TRIGGER data_version_%s_aiudt '
+      'AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+      'FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version()',
+      target,
+      target
+    );
+  END LOOP;
+END;
+$$;
+"""
+
+WEEKLY_TEAM_TOTALS_SQL = """
+CREATE TABLE IF NOT EXISTS weekly_team_totals (
+    week_start DATE NOT NULL,
+    team_id INTEGER NOT NULL REFERENCES teams(id),
+    offense INTEGER NOT NULL DEFAULT 0,
+    pitching INTEGER NOT NULL DEFAULT 0,
+    stat_rows INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (week_start, team_id)
+);
+
+CREATE OR REPLACE FUNCTION apply_weekly_team_totals() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('DELETE', 'UPDATE') THEN
+    UPDATE weekly_team_totals
+    SET offense = offense - COALESCE(OLD.offense, 0),
+        pitching = pitching - COALESCE(OLD.pitching, 0),
+        stat_rows = stat_rows - 1
+    WHERE week_start = date_trunc('week', OLD.date)::date
+      AND team_id = OLD.team_id;
+    DELETE FROM weekly_team_totals
+    WHERE week_start = date_trunc('week', OLD.date)::date
+      AND team_id = OLD.team_id
+      AND stat_rows <= 0;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO weekly_team_totals (week_start, team_id, offense, pitching, stat_rows)
+    VALUES (
+      date_trunc('week', NEW.date)::date,
+      NEW.team_id,
+      COALESCE(NEW.offense, 0),
+      COALESCE(NEW.pitching, 0),
+      1
+    )
+    ON CONFLICT (week_start, team_id) DO UPDATE SET
+      offense = weekly_team_totals.offense + EXCLUDED.offense,
+      pitching = weekly_team_totals.pitching + EXCLUDED.pitching,
+      stat_rows = weekly_team_totals.stat_rows + 1;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION clear_weekly_team_totals() RETURNS trigger AS $$
+BEGIN
+  DELETE FROM weekly_team_totals;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS weekly_team_totals_stats_aiud ON stats;
+DROP TRIGGER IF EXISTS weekly_team_totals_stats_at ON stats;
+
+CREATE TRIGGER weekly_team_totals_stats_aiud
+AFTER INSERT OR UPDATE OR DELETE ON stats
+FOR EACH ROW EXECUTE FUNCTION apply_weekly_team_totals();
+
+CREATE TRIGGER weekly_team_totals_stats_at
+AFTER TRUNCATE ON stats
+FOR EACH STATEMENT EXECUTE FUNCTION clear_weekly_team_totals();
+
+LOCK TABLE stats IN SHARE MODE;
+DELETE FROM weekly_team_totals;
+INSERT INTO weekly_team_totals (week_start, team_id, offense, pitching, stat_rows)
+SELECT
+  date_trunc('week', date)::date,
+  team_id,
+  COALESCE(SUM(offense), 0),
+  COALESCE(SUM(pitching), 0),
+  COUNT(*)
+FROM stats
+GROUP BY 1, 2;
+"""
+
+PLAYER_STAT_RANGES_SQL = """
+CREATE TABLE IF NOT EXISTS player_stat_ranges (
+    player_mlb_id INTEGER PRIMARY KEY REFERENCES players(mlb_id),
+    first_date TIMESTAMP NOT NULL,
+    last_date TIMESTAMP NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION refresh_player_stat_range(target_player INTEGER) RETURNS void AS $$
+BEGIN
+  DELETE FROM player_stat_ranges WHERE player_mlb_id = target_player;
+  INSERT INTO player_stat_ranges (player_mlb_id, first_date, last_date)
+  SELECT target_player, MIN(date), MAX(date)
+  FROM stats
+  WHERE player_mlb_id = target_player
+  HAVING COUNT(*) > 0;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION apply_player_stat_range() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('DELETE', 'UPDATE') THEN
+    IF EXISTS (
+      SELECT 1 FROM player_stat_ranges
+      WHERE player_mlb_id = OLD.player_mlb_id
+        AND (first_date = OLD.date OR last_date = OLD.date)
+    ) THEN
+      PERFORM refresh_player_stat_range(OLD.player_mlb_id);
+    END IF;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO player_stat_ranges (player_mlb_id, first_date, last_date)
+    VALUES (NEW.player_mlb_id, NEW.date, NEW.date)
+    ON CONFLICT (player_mlb_id) DO UPDATE SET
+      first_date = LEAST(player_stat_ranges.first_date, EXCLUDED.first_date),
+      last_date = GREATEST(player_stat_ranges.last_date, EXCLUDED.last_date);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION clear_player_stat_ranges() RETURNS trigger AS $$
+BEGIN
+  DELETE FROM player_stat_ranges;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS player_stat_ranges_stats_aiud ON stats;
+DROP TRIGGER IF EXISTS player_stat_ranges_stats_at ON stats;
+
+CREATE TRIGGER player_stat_ranges_stats_aiud
+AFTER INSERT OR UPDATE OR DELETE ON stats
+FOR EACH ROW EXECUTE FUNCTION apply_player_stat_range();
+
+CREATE TRIGGER player_stat_ranges_stats_at
+AFTER TRUNCATE ON stats
+FOR EACH STATEMENT EXECUTE FUNCTION clear_player_stat_ranges();
+
+LOCK TABLE stats IN SHARE MODE;
+DELETE FROM player_stat_ranges;
+INSERT INTO player_stat_ranges (player_mlb_id, first_date, last_date)
+SELECT player_mlb_id, MIN(date), MAX(date)
+FROM stats
+GROUP BY player_mlb_id;
+"""
+
+SEASON_WEEKS_SQL = """
+CREATE TABLE IF NOT EXISTS season_weeks (
+    week_start DATE PRIMARY KEY,
+    week_end DATE NOT NULL,
+    has_stats BOOLEAN NOT NULL DEFAULT FALSE,
+    is_scored BOOLEAN NOT NULL DEFAULT FALSE
+);
+
+CREATE INDEX IF NOT EXISTS idx_season_weeks_has_stats
+    ON season_weeks(week_start DESC) WHERE has_stats;
+CREATE INDEX IF NOT EXISTS idx_points_date
+    ON points(date);
+
+CREATE OR REPLACE FUNCTION refresh_season_week_stats() RETURNS trigger AS $$
+DECLARE
+  target DATE;
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    target := OLD.week_start;
+  ELSE
+    target := NEW.week_start;
+  END IF;
+  INSERT INTO season_weeks (week_start, week_end, has_stats)
+  VALUES (
+    target,
+    target + 6,
+    EXISTS (SELECT 1 FROM weekly_team_totals WHERE week_start = target)
+  )
+  ON CONFLICT (week_start) DO UPDATE SET has_stats = EXCLUDED.has_stats;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION refresh_season_week_scored(target DATE) RETURNS void AS $$
+BEGIN
+  INSERT INTO season_weeks (week_start, week_end, is_scored)
+  VALUES (
+    target,
+    target + 6,
+    EXISTS (
+      SELECT 1 FROM points
+      WHERE date >= target AND date < target + 7
+    )
+  )
+  ON CONFLICT (week_start) DO UPDATE SET is_scored = EXCLUDED.is_scored;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION refresh_season_week_points() RETURNS trigger AS $$
+DECLARE
+  old_week DATE;
+  new_week DATE;
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    old_week := date_trunc('week', OLD.date)::date;
+    PERFORM refresh_season_week_scored(old_week);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    new_week := date_trunc('week', NEW.date)::date;
+    IF new_week IS DISTINCT FROM old_week THEN
+      PERFORM refresh_season_week_scored(new_week);
+    END IF;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION clear_season_week_points() RETURNS trigger AS $$
+BEGIN
+  UPDATE season_weeks SET is_scored = FALSE WHERE is_scored;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS season_weeks_weekly_team_totals_aid ON weekly_team_totals;
+DROP TRIGGER IF EXISTS season_weeks_points_aiud ON points;
+DROP TRIGGER IF EXISTS season_weeks_points_at ON points;
+
+CREATE TRIGGER season_weeks_weekly_team_totals_aid
+AFTER INSERT OR DELETE ON weekly_team_totals
+FOR EACH ROW EXECUTE FUNCTION refresh_season_week_stats();
+
+CREATE TRIGGER season_weeks_points_aiud
+AFTER INSERT OR UPDATE OR DELETE ON points
+FOR EACH ROW EXECUTE FUNCTION refresh_season_week_points();
+
+CREATE TRIGGER season_weeks_points_at
+AFTER TRUNCATE ON points
+FOR EACH STATEMENT EXECUTE FUNCTION clear_season_week_points();
+
+LOCK TABLE weekly_team_totals, points IN SHARE MODE;
+DELETE FROM season_weeks;
+INSERT INTO season_weeks (week_start, week_end, has_stats, is_scored)
+SELECT
+  weeks.week_start,
+  weeks.week_start + 6,
+  bool_or(weeks.has_stats),
+  bool_or(weeks.is_scored)
+FROM (
+  SELECT DISTINCT week_start, TRUE AS has_stats, FALSE AS is_scored
+  FROM weekly_team_totals
+  UNION ALL
+  SELECT DISTINCT date_trunc('week', date)::date, FALSE, TRUE
+  FROM points
+) AS weeks
+GROUP BY weeks.week_start;
+"""
+
+ROSTER_EVENTS_SQL = """
+CREATE TABLE IF NOT EXISTS roster_events (
+    id INTEGER PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+    team_id INTEGER NOT NULL REFERENCES teams(id) ON DELETE CASCADE,
+    player_mlb_id INTEGER NOT NULL REFERENCES players(mlb_id) ON DELETE CASCADE,
+    event_time TIMESTAMP NOT NULL,
+    action TEXT NOT NULL CHECK (action IN ('add', 'drop')),
+    reason TEXT NOT NULL,
+    source_table TEXT NOT NULL,
+    source_id INTEGER NOT NULL
+);
+
+ALTER TABLE roster_events
+    DROP CONSTRAINT IF EXISTS roster_events_team_id_fkey,
+    ADD CONSTRAINT roster_events_team_id_fkey
+        FOREIGN KEY (team_id) REFERENCES teams(id) ON DELETE CASCADE,
+    DROP CONSTRAINT IF EXISTS roster_events_player_mlb_id_fkey,
+    ADD CONSTRAINT roster_events_player_mlb_id_fkey
+        FOREIGN KEY (player_mlb_id) REFERENCES players(mlb_id) ON DELETE CASCADE;
+
+CREATE INDEX IF NOT EXISTS idx_roster_events_team_time
+    ON roster_events(team_id, event_time DESC);
+CREATE INDEX IF NOT EXISTS idx_roster_events_source
+    ON roster_events(source_table, source_id);
+
+CREATE OR REPLACE FUNCTION roster_event_team_player() RETURNS trigger AS $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM roster_move_requests
+    WHERE team_id = NEW.team_id AND submitted <= CURRENT_TIMESTAMP
+  ) THEN
+    INSERT INTO roster_events (team_id, player_mlb_id, event_time, action, reason, source_table, source_id)
+    VALUES (NEW.team_id, NEW.player_mlb_id, CURRENT_TIMESTAMP, 'add', 'Purchased at auction', 'team_player', NEW.id);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION roster_event_roster_move_request() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    DELETE FROM roster_events
+    WHERE source_table = 'roster_move_requests' AND source_id = OLD.id;
+  END IF;
+  IF TG_OP = 'UPDATE' AND NEW.status = 'processed' THEN
+    INSERT INTO roster_events (team_id, player_mlb_id, event_time, action, reason, source_table, source_id)
+    SELECT NEW.team_id, rmp.player_mlb_id, NEW.submitted, rmp.action, 'Roster move processed', 'roster_move_requests', NEW.id
+    FROM roster_move_request_players rmp
+    WHERE rmp.roster_move_request_id = NEW.id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION roster_event_alumni() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    DELETE FROM roster_events
+    WHERE source_table = 'alumni' AND source_id = OLD.id;
+  ELSIF NEW.team_id IS NOT NULL THEN
+    INSERT INTO roster_events (team_id, player_mlb_id, event_time, action, reason, source_table, source_id)
+    VALUES (NEW.team_id, NEW.player_mlb_id, NEW.deactivated_at, 'drop', 'Removed from MLB 40-man', 'alumni', NEW.id);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION clear_roster_events() RETURNS trigger AS $$
+BEGIN
+  DELETE FROM roster_events WHERE source_table = TG_TABLE_NAME;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS roster_events_team_player_ai ON team_player;
+DROP TRIGGER IF EXISTS roster_events_team_player_at ON team_player;
+DROP TRIGGER IF EXISTS roster_events_roster_move_requests_aud ON roster_move_requests;
+DROP TRIGGER IF EXISTS roster_events_roster_move_requests_at ON roster_move_requests;
+DROP TRIGGER IF EXISTS roster_events_alumni_aid ON alumni;
+DROP TRIGGER IF EXISTS roster_events_alumni_at ON alumni;
+
+CREATE TRIGGER roster_events_team_player_ai
+AFTER INSERT ON team_player
+FOR EACH ROW EXECUTE FUNCTION roster_event_team_player();
+
+CREATE TRIGGER roster_events_team_player_at
+AFTER TRUNCATE ON team_player
+FOR EACH STATEMENT EXECUTE FUNCTION clear_roster_events();
+
+CREATE TRIGGER roster_events_roster_move_requests_aud
+AFTER UPDATE OF status OR DELETE ON roster_move_requests
+FOR EACH ROW EXECUTE FUNCTION roster_event_roster_move_request();
+
+CREATE TRIGGER roster_events_roster_move_requests_at
+AFTER TRUNCATE ON roster_move_requests
+FOR EACH STATEMENT EXECUTE FUNCTION clear_roster_events();
+
+CREATE TRIGGER roster_events_alumni_aid
+AFTER INSERT OR DELETE ON alumni
+FOR EACH ROW EXECUTE FUNCTION roster_event_alumni();
+
+CREATE TRIGGER roster_events_alumni_at
+AFTER TRUNCATE ON alumni
+FOR EACH STATEMENT EXECUTE FUNCTION clear_roster_events();
+
+LOCK TABLE roster_move_requests, alumni IN SHARE MODE;
+DELETE FROM roster_events;
+INSERT INTO roster_events (team_id, player_mlb_id, event_time, action, reason, source_table, source_id)
+SELECT
+  (a.new_value::json->>'team_id')::int,
+  (a.new_value::json->>'player_mlb_id')::int,
+  a.datetime,
+  'add',
+  'Purchased at auction',
+  'team_player',
+  (a.new_value::json->>'id')::int
+FROM audit a
+JOIN players p ON p.mlb_id = (a.new_value::json->>'player_mlb_id')::int
+JOIN teams t ON t.id = (a.new_value::json->>'team_id')::int
+WHERE a.table_name = 'team_player'
+  AND a.operation = 'INSERT'
+  AND NOT EXISTS (
+    SELECT 1 FROM roster_move_requests r
+    WHERE r.team_id = t.id AND r.submitted <= a.datetime
+  );
+INSERT INTO roster_events (team_id, player_mlb_id, event_time, action, reason, source_table, source_id)
+SELECT r.team_id, rmp.player_mlb_id, r.submitted, rmp.action, 'Roster move processed', 'roster_move_requests', r.id
+FROM roster_move_requests r
+JOIN roster_move_request_players rmp ON rmp.roster_move_request_id = r.id
+WHERE r.status = 'processed';
+INSERT INTO roster_events (team_id, player_mlb_id, event_time, action, reason, source_table, source_id)
+SELECT team_id, player_mlb_id, deactivated_at, 'drop', 'Removed from MLB 40-man', 'alumni', id
+FROM alumni
+WHERE team_id IS NOT NULL;
+"""
+
+USER_CACHE_NOTIFY_SQL = """
+CREATE OR REPLACE FUNCTION notify_user_account_changed() RETURNS trigger AS $$
+BEGIN
+  PERFORM pg_notify('user_accounts_changed', OLD.id::text);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_team_renamed() RETURNS trigger AS $$
+BEGIN
+  IF NEW.name IS DISTINCT FROM OLD.name THEN
+    PERFORM pg_notify('user_accounts_changed', '*');
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS notify_user_accounts_aud ON user_accounts;
+DROP TRIGGER IF EXISTS notify_teams_au ON teams;
+
+CREATE TRIGGER notify_user_accounts_aud
+AFTER UPDATE OR DELETE ON user_accounts
+FOR EACH ROW EXECUTE FUNCTION notify_user_account_changed();
+
+CREATE TRIGGER notify_teams_au
+AFTER UPDATE OF name ON teams
+FOR EACH ROW EXECUTE FUNCTION notify_team_renamed();
+"""
+
+# Trigger-maintained tables and notifications, in the order they must be
+# applied: later blocks backfill from tables the earlier ones already manage.
+DERIVED_MIGRATIONS = (
+    ("user_accounts change notifications", USER_CACHE_NOTIFY_SQL),
+    ("data_versions", DATA_VERSION_SQL),
+    ("weekly_team_totals", WEEKLY_TEAM_TOTALS_SQL),
+    ("season_weeks", SEASON_WEEKS_SQL),
+    ("player_stat_ranges", PLAYER_STAT_RANGES_SQL),
+    ("roster_events", ROSTER_EVENTS_SQL),
+)
+
 
 def main():
     if not os.getenv("DATABASE_URL"):
@@ -444,11 +932,19 @@ def main():
                   leagues,
                   user_accounts,
                   user_login_history,
+                  rate_limit_buckets,
+                  data_versions,
+                  weekly_team_totals,
+                  season_weeks,
+                  player_stat_ranges,
+                  roster_events,
                   audit
                 CASCADE
                 """
             )
             cur.execute(SCHEMA_SQL)
+            for _, sql in DERIVED_MIGRATIONS:
+                cur.execute(sql)
             ensure_identities(
                 conn,
                 [
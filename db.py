@@ -1,16 +1,155 @@
+import atexit
 import os
+import re
+import threading
+import time
 
 import psycopg
+from psycopg.pq import TransactionStatus
 from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
 
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+POOL_MAX_IDLE_SECONDS = float(os.getenv("DB_POOL_MAX_IDLE_SECONDS", "300"))
+POOL_MAX_LIFETIME_SECONDS = float(os.getenv("DB_POOL_MAX_LIFETIME_SECONDS", "3600"))
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "250"))
+
+QUERY_LISTENERS = []
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def fingerprint_query(query):
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    text = " ".join(str(query).split())
+    text = re.sub(r"'(?:[^']|'')*'", "?", text)
+    text = re.sub(r"\b\d+\b", "?", text)
+    return text[:200]
+
+
+def add_query_listener(listener):
+    QUERY_LISTENERS.append(listener)
+
+
+def record_query(query, duration_ms, rowcount):
+    fingerprint = fingerprint_query(query)
+    if duration_ms >= SLOW_QUERY_MS:
+        print(f"Warning: slow query ({duration_ms:.1f} ms, {rowcount} rows): {fingerprint}")
+    for listener in QUERY_LISTENERS:
+        listener(fingerprint, duration_ms, rowcount)
+
+
+class InstrumentedCursor(psycopg.Cursor):
+    def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, params, **kwargs)
+        finally:
+            record_query(query, (time.perf_counter() - started) * 1000, self.rowcount)
+
+    def executemany(self, query, params_seq, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, params_seq, **kwargs)
+        finally:
+            record_query(query, (time.perf_counter() - started) * 1000, self.rowcount)
+
+
+class PooledConnection:
+    # Wraps a pooled connection so close() and the context manager hand it
+    # back to the pool instead of tearing down the socket.
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise psycopg.OperationalError("the connection is closed")
+        return getattr(self._conn, name)
+
+    @property
+    def closed(self):
+        return self._conn is None or self._conn.closed
+
+    def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        if not conn.closed and conn.info.transaction_status in {
+            TransactionStatus.INTRANS,
+            TransactionStatus.INERROR,
+        }:
+            conn.rollback()
+        self._pool.putconn(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._conn is None:
+            return
+        try:
+            if exc_type is None and not self._conn.closed:
+                self._conn.commit()
+            elif not self._conn.closed:
+                self._conn.rollback()
+        finally:
+            self.close()
+
+
+def connect():
+    if not DATABASE_URL:
+        raise SystemExit("DATABASE_URL is not set.")
+    return psycopg.connect(
+        DATABASE_URL,
+        row_factory=dict_row,
+        cursor_factory=InstrumentedCursor,
+    )
+
+
+def get_pool():
+    global _pool
+    if _pool is not None:
+        return _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                DATABASE_URL,
+                kwargs={"row_factory": dict_row, "cursor_factory": InstrumentedCursor},
+                min_size=min(POOL_MIN_SIZE, POOL_MAX_SIZE),
+                max_size=POOL_MAX_SIZE,
+                timeout=POOL_TIMEOUT_SECONDS,
+                max_idle=POOL_MAX_IDLE_SECONDS,
+                max_lifetime=POOL_MAX_LIFETIME_SECONDS,
+                check=ConnectionPool.check_connection,
+                name="ebl",
+                open=True,
+            )
+            atexit.register(close_pool)
+    return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
 
 
 def get_connection():
     if not DATABASE_URL:
         raise SystemExit("DATABASE_URL is not set.")
-    return psycopg.connect(DATABASE_URL, row_factory=dict_row)
+    if POOL_MAX_SIZE <= 0:
+        return connect()
+    pool = get_pool()
+    return PooledConnection(pool, pool.getconn())
 
 
 def ensure_identity(conn, table_name):
@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+
+import psycopg
+from psycopg_pool import PoolTimeout
+
+
+REFILL_SQL = (
+    "LEAST(%(capacity)s, b.tokens"
+    " + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * %(rate)s)"
+)
+
+
+class TokenBucketLimiter:
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key, capacity, window_seconds, now=None):
+        if now is None:
+            now = time.monotonic()
+        refill_rate = capacity / window_seconds
+        with self._lock:
+            bucket = self._buckets.pop(key, None)
+            if bucket is None:
+                tokens = float(capacity)
+            else:
+                tokens, updated_at = bucket
+                tokens = min(float(capacity), tokens + (now - updated_at) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class PostgresTokenBucketLimiter:
+    def __init__(self, get_conn, fallback=None, idle_seconds=3600, sweep_interval_seconds=300):
+        self.get_conn = get_conn
+        self.fallback = fallback or TokenBucketLimiter()
+        self.idle_seconds = idle_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._next_sweep = 0.0
+
+    def allow(self, key, capacity, window_seconds):
+        # get_conn must hand out its own short-lived connection: the bucket
+        # update commits, so it cannot share a request's open transaction.
+        try:
+            with self.get_conn() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"""
+                    INSERT INTO rate_limit_buckets AS b (bucket_key, tokens, allowed, updated_at)
+                    VALUES (%(key)s, %(capacity)s - 1, TRUE, clock_timestamp())
+                    ON CONFLICT (bucket_key) DO UPDATE SET
+                        tokens = CASE
+                            WHEN {REFILL_SQL} >= 1 THEN {REFILL_SQL} - 1
+                            ELSE {REFILL_SQL}
+                        END,
+                        allowed = {REFILL_SQL} >= 1,
+                        updated_at = clock_timestamp()
+                    RETURNING allowed
+                    """,
+                    {
+                        "key": key,
+                        "capacity": float(capacity),
+                        "rate": capacity / window_seconds,
+                    },
+                )
+                allowed = cursor.fetchone()["allowed"]
+                if time.monotonic() >= self._next_sweep:
+                    self._next_sweep = time.monotonic() + self.sweep_interval_seconds
+                    cursor.execute(
+                        """
+                        DELETE FROM rate_limit_buckets
+                        WHERE updated_at < clock_timestamp() - (%s * INTERVAL '1 second')
+                        """,
+                        (self.idle_seconds,),
+                    )
+                conn.commit()
+            return allowed
+        except (psycopg.Error, PoolTimeout) as exc:
+            print(f"Warning: shared rate limiter unavailable, using local buckets: {exc}")
+            return self.fallback.allow(key, capacity, window_seconds)
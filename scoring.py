@@ -1,9 +1,15 @@
-from datetime import datetime, timedelta
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from itertools import repeat
+import multiprocessing
+import os
 
-from db import get_connection, ensure_identities
+from db import connect, get_connection, ensure_identities
 
 OFFENSE_POINTS = {1: 10, 2: 8, 3: 4}
 DEFENSE_POINTS = {1: 10, 2: 8, 3: 4}
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", "1"))
 
 
 def week_start(date_value):
@@ -14,36 +20,70 @@ def week_end(date_value):
     return week_start(date_value) + timedelta(days=6)
 
 
-def load_weekly_totals(conn):
+def load_league_ids(conn):
     cursor = conn.cursor()
+    cursor.execute("SELECT DISTINCT league_id FROM teams ORDER BY league_id")
+    return [row["league_id"] for row in cursor.fetchall()]
+
+
+def load_weekly_totals(conn, week_starts=None, league_id=None):
+    cursor = conn.cursor()
+    clauses = []
+    params = []
+    if week_starts is not None:
+        clauses.append("w.week_start = ANY(%s)")
+        params.append(list(week_starts))
+    if league_id is not None:
+        clauses.append("t.league_id = %s")
+        params.append(league_id)
+    where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
     cursor.execute(
-        """
-        SELECT team_id, date, offense, pitching
-        FROM stats
-        """
+        f"""
+        SELECT w.week_start, w.team_id, w.offense, w.pitching
+        FROM weekly_team_totals w
+        JOIN teams t ON t.id = w.team_id
+        {where_sql}
+        ORDER BY w.week_start, w.team_id
+        """,
+        params,
     )
     weekly = {}
-    for row in cursor.fetchall():
-        value = row["date"]
-        if isinstance(value, datetime):
-            game_date = value.date()
-        elif hasattr(value, "isoformat") and not isinstance(value, str):
-            game_date = value
-        else:
-            try:
-                game_date = datetime.strptime(value, "%Y-%m-%d").date()
-            except (TypeError, ValueError):
-                continue
-        start = week_start(game_date)
-        totals = weekly.setdefault(start, {})
-        team_totals = totals.setdefault(
-            row["team_id"], {"offense": 0, "pitching": 0}
-        )
-        team_totals["offense"] += row["offense"] or 0
-        team_totals["pitching"] += row["pitching"] or 0
+    for row in cursor:
+        totals = weekly.setdefault(row["week_start"], {})
+        totals[row["team_id"]] = {
+            "offense": row["offense"],
+            "pitching": row["pitching"],
+        }
     return weekly
 
 
+def load_unscored_week_starts(conn, league_id, week_end_date=None):
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT w.week_start
+        FROM weekly_team_totals w
+        JOIN teams t ON t.id = w.team_id
+        WHERE t.league_id = %(league_id)s
+          AND (%(week_start)s::date IS NULL OR w.week_start = %(week_start)s::date)
+        GROUP BY w.week_start
+        HAVING NOT EXISTS (
+            SELECT 1
+            FROM points p
+            JOIN teams pt ON pt.id = p.team_id
+            WHERE pt.league_id = %(league_id)s
+              AND p.date = w.week_start + 6
+        )
+        ORDER BY w.week_start
+        """,
+        {
+            "league_id": league_id,
+            "week_start": week_start(week_end_date) if week_end_date else None,
+        },
+    )
+    return [row["week_start"] for row in cursor.fetchall()]
+
+
 def award_points_for_category(team_totals, points_map):
     ordered = sorted(
         team_totals.items(), key=lambda item: (item[1], item[0]), reverse=True
@@ -64,63 +104,219 @@ def award_points_for_category(team_totals, points_map):
     return awards
 
 
-def score_weeks(conn=None, week_end_date=None):
+def load_rescore_week_starts(conn, league_id, week_end_date=None):
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT week_start
+        FROM (
+            SELECT w.week_start
+            FROM weekly_team_totals w
+            JOIN teams t ON t.id = w.team_id
+            WHERE t.league_id = %(league_id)s
+            UNION
+            SELECT date_trunc('week', p.date)::date
+            FROM points p
+            JOIN teams t ON t.id = p.team_id
+            WHERE t.league_id = %(league_id)s
+        ) weeks
+        WHERE %(week_start)s::date IS NULL OR week_start = %(week_start)s::date
+        ORDER BY week_start
+        """,
+        {
+            "league_id": league_id,
+            "week_start": week_start(week_end_date) if week_end_date else None,
+        },
+    )
+    return [row["week_start"] for row in cursor.fetchall()]
+
+
+def award_points_batch(matrix, points_map):
+    awards = []
+    for week_index, row in enumerate(matrix):
+        team_totals = {
+            team_index: total for team_index, total in enumerate(row) if total is not None
+        }
+        for team_index, points in award_points_for_category(team_totals, points_map):
+            awards.append((week_index, team_index, points))
+    return awards
+
+
+def build_point_rows(weekly):
+    week_starts = sorted(weekly)
+    team_ids = sorted({team_id for team_totals in weekly.values() for team_id in team_totals})
+    point_rows = []
+    for point_type, total_key, points_map in (
+        ("offense", "offense", OFFENSE_POINTS),
+        ("defense", "pitching", DEFENSE_POINTS),
+    ):
+        matrix = [
+            [
+                weekly[week_start_date][team_id][total_key]
+                if team_id in weekly[week_start_date]
+                else None
+                for team_id in team_ids
+            ]
+            for week_start_date in week_starts
+        ]
+        for week_index, team_index, points in award_points_batch(matrix, points_map):
+            point_rows.append(
+                (
+                    team_ids[team_index],
+                    week_end(week_starts[week_index]).isoformat(),
+                    points,
+                    point_type,
+                )
+            )
+    return point_rows
+
+
+def load_stored_points(conn, week_end_dates, league_id):
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT p.id, p.team_id, p.date, p.type, p.value
+        FROM points p
+        JOIN teams t ON t.id = p.team_id
+        WHERE p.date = ANY(%s) AND t.league_id = %s
+        """,
+        ([value.isoformat() for value in week_end_dates], league_id),
+    )
+    stored = {}
+    for row in cursor:
+        key = (row["team_id"], row["date"].date().isoformat(), row["type"])
+        stored[key] = (row["id"], row["value"])
+    return stored
+
+
+def diff_point_rows(point_rows, stored):
+    upserts = []
+    wanted = set()
+    for team_id, date_value, points, point_type in point_rows:
+        key = (team_id, date_value, point_type)
+        wanted.add(key)
+        current = stored.get(key)
+        if current is None or current[1] != points:
+            upserts.append((team_id, date_value, points, point_type))
+    deletes = [row_id for key, (row_id, _) in stored.items() if key not in wanted]
+    return upserts, deletes
+
+
+def score_league(conn, league_id, week_end_date=None, rescore=False):
+    cursor = conn.cursor()
+    if rescore:
+        week_starts = load_rescore_week_starts(conn, league_id, week_end_date)
+    else:
+        week_starts = load_unscored_week_starts(conn, league_id, week_end_date)
+    weekly = (
+        load_weekly_totals(conn, week_starts=week_starts, league_id=league_id)
+        if week_starts
+        else {}
+    )
+    point_rows = build_point_rows(weekly)
+    deletes = []
+    if rescore and week_starts:
+        stored = load_stored_points(
+            conn, [week_end(value) for value in week_starts], league_id
+        )
+        point_rows, deletes = diff_point_rows(point_rows, stored)
+
+    if point_rows:
+        cursor.executemany(
+            """
+            INSERT INTO points (team_id, date, value, type)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (team_id, date, type) DO UPDATE
+            SET value = EXCLUDED.value
+            WHERE points.value IS DISTINCT FROM EXCLUDED.value
+            """,
+            point_rows,
+        )
+    if deletes:
+        cursor.execute("DELETE FROM points WHERE id = ANY(%s)", (deletes,))
+    conn.commit()
+    return league_id, len(week_starts), len(point_rows), len(deletes)
+
+
+def score_league_in_process(league_id, week_end_date=None, rescore=False):
+    with connect() as conn:
+        ensure_identities(conn, ["points"])
+        return score_league(conn, league_id, week_end_date, rescore)
+
+
+def score_weeks(conn=None, week_end_date=None, rescore=False, league_id=None, workers=None):
+    workers = SCORING_WORKERS if workers is None else workers
     own_conn = conn is None
     if own_conn:
         conn = get_connection()
     try:
-        cursor = conn.cursor()
         ensure_identities(conn, ["points"])
-        weekly = load_weekly_totals(conn)
-        point_rows = []
-        for week_start_date, team_totals in weekly.items():
-            candidate_end = week_end(week_start_date)
-            if week_end_date and candidate_end != week_end_date:
-                continue
-
-            cursor.execute(
-                "SELECT COUNT(*) AS count FROM points WHERE date = %s",
-                (candidate_end.isoformat(),),
-            )
-            if cursor.fetchone()["count"] > 0:
-                continue
-
-            offense_totals = {
-                team_id: totals["offense"] for team_id, totals in team_totals.items()
-            }
-            pitching_totals = {
-                team_id: totals["pitching"] for team_id, totals in team_totals.items()
-            }
-
-            for team_id, points in award_points_for_category(
-                offense_totals, OFFENSE_POINTS
-            ):
-                point_rows.append(
-                    (team_id, candidate_end.isoformat(), points, "offense")
-                )
-
-            for team_id, points in award_points_for_category(
-                pitching_totals, DEFENSE_POINTS
-            ):
-                point_rows.append(
-                    (team_id, candidate_end.isoformat(), points, "defense")
+        league_ids = [league_id] if league_id is not None else load_league_ids(conn)
+        if own_conn and workers > 1 and len(league_ids) > 1:
+            conn.close()
+            conn = None
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(league_ids)),
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as executor:
+                results = list(
+                    executor.map(
+                        score_league_in_process,
+                        league_ids,
+                        repeat(week_end_date),
+                        repeat(rescore),
+                    )
                 )
-
-        if point_rows:
-            cursor.executemany(
-                """
-                INSERT INTO points (team_id, date, value, type)
-                VALUES (%s, %s, %s, %s)
-                """,
-                point_rows,
-            )
-        conn.commit()
+        else:
+            results = [
+                score_league(conn, value, week_end_date, rescore) for value in league_ids
+            ]
     finally:
-        if own_conn:
+        if own_conn and conn is not None:
             conn.close()
 
-    print(f"Awarded {len(point_rows)} point rows.")
+    for result_league_id, week_count, written, removed in results:
+        if rescore:
+            print(
+                f"League {result_league_id}: rescored {week_count} weeks, "
+                f"{written} point rows written, {removed} removed."
+            )
+        else:
+            print(f"League {result_league_id}: awarded {written} point rows.")
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Award weekly category points.")
+    parser.add_argument(
+        "--rescore",
+        action="store_true",
+        help="Recompute already-scored weeks and apply only changed point rows.",
+    )
+    parser.add_argument(
+        "--week-end",
+        type=date.fromisoformat,
+        help="Only score the week ending on this date (YYYY-MM-DD).",
+    )
+    parser.add_argument(
+        "--league-id",
+        type=int,
+        help="Only score this league.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=SCORING_WORKERS,
+        help="Score leagues in parallel across this many processes.",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    score_weeks()
+    args = parse_args()
+    score_weeks(
+        week_end_date=args.week_end,
+        rescore=args.rescore,
+        league_id=args.league_id,
+        workers=args.workers,
+    )
@@ -1,5 +1,8 @@
 from pathlib import Path
+import fcntl
+import hashlib
 import html
+import os
 import re
 
 try:
@@ -11,6 +14,8 @@ except ImportError:
 ROOT = Path(__file__).resolve().parents[1]
 NOTEBOOK_PATH = ROOT / "lab_notebook.md"
 OUTPUT_PATH = ROOT / "templates" / "news.html"
+LOCK_PATH = ROOT / ".news-build.lock"
+HASH_MARKER = "{# source-sha256: "
 
 
 def flush_paragraph(paragraph_lines, blocks):
@@ -117,7 +122,7 @@ def build_news_page(sections):
     <meta charset="utf-8" />
     <meta name="viewport" content="width=device-width, initial-scale=1" />
     <title>EBL News</title>
-    <link rel="stylesheet" href="{{{{ url_for('static', filename='styles.css') }}}}" />
+    <link rel="stylesheet" href="{{{{ asset_url('styles.css') }}}}" />
   </head>
   <body>
     <div class="backdrop"></div>
@@ -177,13 +182,38 @@ def render_markdown(text):
     return "<p>" + linked.replace("\n", "<br />") + "</p>"
 
 
+def built_hash():
+    try:
+        with OUTPUT_PATH.open(encoding="utf-8") as handle:
+            first_line = handle.readline()
+    except FileNotFoundError:
+        return None
+    if not first_line.startswith(HASH_MARKER):
+        return None
+    return first_line[len(HASH_MARKER) :].split(" ", 1)[0]
+
+
+def build(force=False):
+    source = NOTEBOOK_PATH.read_bytes()
+    digest = hashlib.sha256(source)
+    digest.update(Path(__file__).read_bytes())
+    source_hash = digest.hexdigest()
+    with LOCK_PATH.open("w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        if not force and built_hash() == source_hash:
+            return False
+        sections = parse_sections(source.decode("utf-8").splitlines())
+        page = f"{HASH_MARKER}{source_hash} #}}\n" + build_news_page(sections)
+        tmp_path = OUTPUT_PATH.with_suffix(".html.tmp")
+        tmp_path.write_text(page, encoding="utf-8")
+        os.replace(tmp_path, OUTPUT_PATH)
+    return True
+
+
 def main():
     if not NOTEBOOK_PATH.exists():
         raise SystemExit("lab_notebook.md not found.")
-    lines = NOTEBOOK_PATH.read_text(encoding="utf-8").splitlines()
-    sections = parse_sections(lines)
-    html = build_news_page(sections)
-    OUTPUT_PATH.write_text(html, encoding="utf-8")
+    build(force=True)
 
 
 if __name__ == "__main__":
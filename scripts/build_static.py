@@ -0,0 +1,52 @@
+from pathlib import Path
+import hashlib
+import json
+import shutil
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from compression import compress_body, supported_encodings
+
+
+STATIC_DIR = ROOT / "static"
+DIST_DIR = STATIC_DIR / "dist"
+MANIFEST_PATH = DIST_DIR / "manifest.json"
+ASSET_SUFFIXES = {".css", ".js"}
+
+
+def fingerprint_name(path, content):
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    return f"{path.stem}.{digest}{path.suffix}"
+
+
+def build_assets():
+    if DIST_DIR.exists():
+        shutil.rmtree(DIST_DIR)
+    DIST_DIR.mkdir(parents=True)
+    manifest = {}
+    for path in sorted(STATIC_DIR.iterdir()):
+        if not path.is_file() or path.suffix not in ASSET_SUFFIXES:
+            continue
+        content = path.read_bytes()
+        name = fingerprint_name(path, content)
+        (DIST_DIR / name).write_bytes(content)
+        for encoding in supported_encodings():
+            suffix = ".br" if encoding == "br" else ".gz"
+            compressed = compress_body(content, encoding, level=11 if encoding == "br" else 9)
+            (DIST_DIR / f"{name}{suffix}").write_bytes(compressed)
+        manifest[path.name] = f"dist/{name}"
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    return manifest
+
+
+def main():
+    manifest = build_assets()
+    for source, target in manifest.items():
+        print(f"{source} -> {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -123,6 +123,7 @@ def assign_players_to_teams(conn, team_ids, force=False, seed=None, max_per_team
     cursor = conn.cursor()
     ensure_identities(conn, ["team_player"])
     if force:
+        cursor.execute("DELETE FROM roster_events WHERE source_table = 'team_player'")
         cursor.execute("DELETE FROM team_player")
     else:
         cursor.execute("SELECT COUNT(*) AS count FROM team_player")
@@ -0,0 +1,36 @@
+import os
+import sys
+from importlib.util import module_from_spec, spec_from_file_location
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from db import get_connection
+
+
+def load_db_init():
+    spec = spec_from_file_location("db_init", ROOT_DIR / "db-init.py")
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module
+
+
+def main():
+    if not os.getenv("DATABASE_URL"):
+        raise SystemExit("DATABASE_URL is not set.")
+
+    db_init = load_db_init()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        for name, sql in db_init.DERIVED_MIGRATIONS:
+            cursor.execute(sql)
+            conn.commit()
+            print(f"{name} installed.")
+
+    print("Derived table migrations complete.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import os
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from db import get_connection
+
+
+def main():
+    if not os.getenv("DATABASE_URL"):
+        raise SystemExit("DATABASE_URL is not set.")
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("LOCK TABLE points IN SHARE ROW EXCLUSIVE MODE")
+        cursor.execute(
+            """
+            DELETE FROM points p
+            USING points keep
+            WHERE keep.team_id = p.team_id
+              AND keep.date = p.date
+              AND keep.type = p.type
+              AND keep.id < p.id
+            """
+        )
+        removed = cursor.rowcount
+        cursor.execute(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_points_team_date_type
+                ON points(team_id, date, type)
+            """
+        )
+        conn.commit()
+
+    print(f"points unique index created ({removed} duplicate rows removed).")
+
+
+if __name__ == "__main__":
+    main()
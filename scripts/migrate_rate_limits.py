@@ -0,0 +1,40 @@
+import os
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from db import get_connection
+
+
+def main():
+    if not os.getenv("DATABASE_URL"):
+        raise SystemExit("DATABASE_URL is not set.")
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_buckets (
+                bucket_key TEXT PRIMARY KEY,
+                tokens DOUBLE PRECISION NOT NULL,
+                allowed BOOLEAN NOT NULL,
+                updated_at TIMESTAMPTZ NOT NULL
+            )
+            """
+        )
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_rate_limit_buckets_updated
+                ON rate_limit_buckets(updated_at)
+            """
+        )
+        conn.commit()
+
+    print("rate_limit_buckets table migration complete.")
+
+
+if __name__ == "__main__":
+    main()
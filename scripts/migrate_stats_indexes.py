@@ -0,0 +1,36 @@
+import os
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from db import get_connection
+
+
+def main():
+    if not os.getenv("DATABASE_URL"):
+        raise SystemExit("DATABASE_URL is not set.")
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_stats_team_date
+                ON stats(team_id, date)
+            """
+        )
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_stats_player_date
+                ON stats(player_mlb_id, date)
+            """
+        )
+        conn.commit()
+
+    print("stats index migration complete.")
+
+
+if __name__ == "__main__":
+    main()
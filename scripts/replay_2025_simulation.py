@@ -413,14 +413,6 @@ def main() -> None:
         roster_moves = load_module("roster_moves", "roster-moves.py")
         roster_sync = load_module("roster_sync", "roster-sync.py")
 
-        with conn.transaction():
-            cursor = conn.cursor()
-            clear_end = end_date + timedelta(days=6)
-            cursor.execute(
-                "DELETE FROM points WHERE date BETWEEN %s AND %s",
-                (start_date.isoformat(), clear_end.isoformat()),
-            )
-
         for day in iter_dates(start_date, end_date):
             if weekly_log is None:
                 week_start = day - timedelta(days=day.weekday())
@@ -486,7 +478,7 @@ def main() -> None:
             prev_roster_ids = roster_ids
 
             if day.weekday() == 6:
-                score_weeks(conn=conn, week_end_date=day)
+                score_weeks(conn=conn, week_end_date=day, rescore=True)
                 roster_moves.main(log_date=day)
 
                 cursor = conn.cursor()
@@ -499,6 +491,10 @@ def main() -> None:
 
         if weekly_log:
             cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM points WHERE date = %s",
+                (weekly_log.week_end.isoformat(),),
+            )
             weekly_log.roster_changes.extend(
                 log_roster_changes(cursor, weekly_log.week_start, weekly_log.week_end)
             )
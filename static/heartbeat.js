@@ -1,12 +1,19 @@
 (function () {
   const intervalMs = 60000;
+  const renderActiveUsers = (count) => {
+    document.querySelectorAll("[data-active-users]").forEach((element) => {
+      element.textContent = `${count} people online`;
+    });
+  };
   const sendHeartbeat = () => {
-    const url = "/heartbeat";
-    if (navigator.sendBeacon) {
-      navigator.sendBeacon(url);
-      return;
-    }
-    fetch(url, { method: "POST", credentials: "same-origin" }).catch(() => {});
+    fetch("/heartbeat", { method: "POST", credentials: "same-origin", keepalive: true })
+      .then((response) => (response.ok ? response.json() : null))
+      .then((data) => {
+        if (data && typeof data.active_user_count === "number") {
+          renderActiveUsers(data.active_user_count);
+        }
+      })
+      .catch(() => {});
   };
 
   sendHeartbeat();
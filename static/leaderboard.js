@@ -1,7 +1,74 @@
 const weekSelect = document.getElementById("week-select");
+
+function renderWeeklyCard(card, title, totalLabel, rows) {
+  const showPoints = rows.some((row) => "points" in row);
+  const header = document.createElement("div");
+  header.className = "stats-row header weekly-row";
+  const headerLabels = ["Team", totalLabel].concat(showPoints ? ["Points"] : []);
+  headerLabels.forEach((label) => {
+    const span = document.createElement("span");
+    span.textContent = label;
+    header.appendChild(span);
+  });
+
+  const heading = document.createElement("h2");
+  heading.textContent = title;
+  card.replaceChildren(heading, header);
+
+  rows.forEach((row, index) => {
+    const line = document.createElement("div");
+    line.className = "stats-row weekly-row";
+    line.style.setProperty("--i", index);
+
+    const teamCell = document.createElement("span");
+    const link = document.createElement("a");
+    link.href = `/team?team_id=${row.id}`;
+    link.textContent = row.name;
+    teamCell.appendChild(link);
+    line.appendChild(teamCell);
+
+    const totalCell = document.createElement("span");
+    totalCell.textContent = row.total;
+    line.appendChild(totalCell);
+
+    if (showPoints) {
+      const pointsCell = document.createElement("span");
+      pointsCell.textContent = row.points ?? "-";
+      line.appendChild(pointsCell);
+    }
+    card.appendChild(line);
+  });
+}
+
+async function loadWeek(weekStart) {
+  const response = await fetch(`/api/week?week_start=${encodeURIComponent(weekStart)}`, {
+    headers: { Accept: "application/json" },
+  });
+  if (!response.ok) {
+    throw new Error(`Week request failed with ${response.status}`);
+  }
+  const data = await response.json();
+  const cards = document.querySelectorAll(".leaderboard-card");
+  if (cards.length < 2) {
+    throw new Error("Leaderboard cards not found");
+  }
+  renderWeeklyCard(cards[0], "Pitching", "Outs", data.pitching);
+  renderWeeklyCard(cards[1], "Hitting", "Offense", data.offense);
+}
+
 if (weekSelect) {
-  weekSelect.addEventListener("change", () => {
+  weekSelect.addEventListener("change", async () => {
     const weekStart = weekSelect.value;
-    window.location.href = `/week?week_start=${weekStart}`;
+    const url = `/week?week_start=${weekStart}`;
+    try {
+      await loadWeek(weekStart);
+      window.history.pushState({ weekStart }, "", url);
+    } catch (error) {
+      window.location.href = url;
+    }
+  });
+
+  window.addEventListener("popstate", () => {
+    window.location.reload();
   });
 }
@@ -0,0 +1,28 @@
+from importlib.util import module_from_spec, spec_from_file_location
+from pathlib import Path
+
+
+def load_build_news_module():
+    module_path = Path(__file__).resolve().parents[1] / "scripts" / "build_news.py"
+    spec = spec_from_file_location("build_news", module_path)
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module
+
+
+def test_build_skips_when_notebook_hash_matches(monkeypatch, tmp_path):
+    build_news = load_build_news_module()
+    notebook = tmp_path / "lab_notebook.md"
+    output = tmp_path / "news.html"
+    notebook.write_text("# January 1, 2026\n\nOpening day.\n", encoding="utf-8")
+    monkeypatch.setattr(build_news, "NOTEBOOK_PATH", notebook)
+    monkeypatch.setattr(build_news, "OUTPUT_PATH", output)
+    monkeypatch.setattr(build_news, "LOCK_PATH", tmp_path / ".news-build.lock")
+
+    assert build_news.build() is True
+    assert "Opening day." in output.read_text(encoding="utf-8")
+    assert build_news.build() is False
+
+    notebook.write_text("# January 2, 2026\n\nDay two.\n", encoding="utf-8")
+    assert build_news.build() is True
+    assert "Day two." in output.read_text(encoding="utf-8")
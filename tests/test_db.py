@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+from psycopg.pq import TransactionStatus
+
+import db
+
+
+class FakeConnection:
+    def __init__(self, status=TransactionStatus.IDLE):
+        self.closed = False
+        self.info = SimpleNamespace(transaction_status=status)
+        self.calls = []
+
+    def commit(self):
+        self.calls.append("commit")
+        self.info.transaction_status = TransactionStatus.IDLE
+
+    def rollback(self):
+        self.calls.append("rollback")
+        self.info.transaction_status = TransactionStatus.IDLE
+
+
+class FakePool:
+    def __init__(self):
+        self.returned = []
+
+    def putconn(self, conn):
+        self.returned.append(conn)
+
+
+def test_pooled_connection_close_returns_to_pool():
+    pool = FakePool()
+    raw = FakeConnection(TransactionStatus.INTRANS)
+    conn = db.PooledConnection(pool, raw)
+    conn.close()
+    conn.close()
+    assert pool.returned == [raw]
+    assert raw.calls == ["rollback"]
+    assert conn.closed
+
+
+def test_pooled_connection_context_commits_and_returns():
+    pool = FakePool()
+    raw = FakeConnection(TransactionStatus.INTRANS)
+    with db.PooledConnection(pool, raw) as conn:
+        assert conn.info is raw.info
+    assert raw.calls == ["commit"]
+    assert pool.returned == [raw]
+
+
+def test_pooled_connection_context_rolls_back_on_error():
+    pool = FakePool()
+    raw = FakeConnection(TransactionStatus.INTRANS)
+    try:
+        with db.PooledConnection(pool, raw):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert raw.calls == ["rollback"]
+    assert pool.returned == [raw]
+
+
+def test_fingerprint_query_normalizes_literals_and_whitespace():
+    query = """
+        SELECT id FROM teams
+        WHERE name = 'O''Brien' AND id = 42 AND league_id = %s
+    """
+    assert db.fingerprint_query(query) == (
+        "SELECT id FROM teams WHERE name = ? AND id = ? AND league_id = %s"
+    )
+
+
+def test_record_query_notifies_listeners(monkeypatch):
+    seen = []
+    monkeypatch.setattr(db, "QUERY_LISTENERS", [])
+    db.add_query_listener(lambda *args: seen.append(args))
+    db.record_query("SELECT 1", 1.5, 1)
+    assert seen == [("SELECT ?", 1.5, 1)]
@@ -1,10 +1,12 @@
 import os
-from datetime import date
+from datetime import date, datetime
 from importlib.util import module_from_spec, spec_from_file_location
 from pathlib import Path
 
 import pytest
+from flask import g
 
+import app as app_module
 from db import get_connection
 
 
@@ -147,3 +149,299 @@ def test_apply_mlb_roster_changes_removal():
         assert cursor.fetchone()["has_empty_roster_spot"] == 1
 
         conn.rollback()
+
+
+def load_demo_league_module():
+    module_path = Path(__file__).resolve().parents[1] / "scripts" / "make-demo-league.py"
+    spec = spec_from_file_location("make_demo_league", module_path)
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module
+
+
+def test_demo_league_reset_can_rerun_with_roster_events():
+    demo_league = load_demo_league_module()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO players (mlb_id, name, is_active)
+            VALUES (%s, %s, 1)
+            ON CONFLICT (mlb_id) DO NOTHING
+            """,
+            (999999, "Test Player"),
+        )
+        for _ in range(2):
+            team_ids = demo_league.make_test_league_and_teams(conn, team_count=2, seed=1)
+            demo_league.assign_players_to_teams(conn, team_ids, force=True, seed=1)
+
+        cursor.execute(
+            """
+            SELECT COUNT(*) AS count
+            FROM roster_events e
+            WHERE e.source_table = 'team_player'
+              AND NOT EXISTS (SELECT 1 FROM team_player tp WHERE tp.id = e.source_id)
+            """
+        )
+        assert cursor.fetchone()["count"] == 0
+        cursor.execute("SELECT COUNT(*) AS count FROM team_player")
+        assigned = cursor.fetchone()["count"]
+        cursor.execute("SELECT COUNT(*) AS count FROM roster_events")
+        assert cursor.fetchone()["count"] == assigned
+
+        cursor.execute("TRUNCATE team_player")
+        cursor.execute("SELECT COUNT(*) AS count FROM roster_events")
+        assert cursor.fetchone()["count"] == 0
+
+        conn.rollback()
+
+
+WEEK_A = date(1999, 4, 5)
+WEEK_B = date(1999, 4, 12)
+
+
+def seed_team(cursor, mlb_id=999999):
+    cursor.execute(
+        "INSERT INTO leagues (name, year) VALUES (%s, %s) RETURNING id",
+        ("Trigger League", 1999),
+    )
+    league_id = cursor.fetchone()["id"]
+    cursor.execute(
+        "INSERT INTO users (email) VALUES (%s) RETURNING id",
+        ("triggers@example.com",),
+    )
+    user_id = cursor.fetchone()["id"]
+    cursor.execute(
+        """
+        INSERT INTO teams (league_id, user_id, name, has_empty_roster_spot)
+        VALUES (%s, %s, %s, 0)
+        RETURNING id
+        """,
+        (league_id, user_id, "Trigger Team"),
+    )
+    team_id = cursor.fetchone()["id"]
+    cursor.execute(
+        """
+        INSERT INTO players (mlb_id, name, is_active)
+        VALUES (%s, %s, 1)
+        ON CONFLICT (mlb_id) DO NOTHING
+        """,
+        (mlb_id, "Trigger Player"),
+    )
+    return team_id
+
+
+def weekly_totals(cursor, team_id):
+    cursor.execute(
+        """
+        SELECT week_start, offense, pitching, stat_rows
+        FROM weekly_team_totals
+        WHERE team_id = %s
+        ORDER BY week_start
+        """,
+        (team_id,),
+    )
+    return [tuple(row.values()) for row in cursor.fetchall()]
+
+
+def season_week(cursor, week_start):
+    cursor.execute(
+        "SELECT has_stats, is_scored FROM season_weeks WHERE week_start = %s",
+        (week_start,),
+    )
+    row = cursor.fetchone()
+    return (row["has_stats"], row["is_scored"]) if row else None
+
+
+def stat_range(cursor, mlb_id=999999):
+    cursor.execute(
+        "SELECT first_date, last_date FROM player_stat_ranges WHERE player_mlb_id = %s",
+        (mlb_id,),
+    )
+    row = cursor.fetchone()
+    return (row["first_date"], row["last_date"]) if row else None
+
+
+def test_stats_triggers_maintain_derived_tables():
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        team_id = seed_team(cursor)
+        cursor.execute(
+            """
+            INSERT INTO stats (player_mlb_id, team_id, date, offense, pitching)
+            VALUES (%s, %s, %s, 3, 0), (%s, %s, %s, 1, 6)
+            RETURNING id
+            """,
+            (999999, team_id, datetime(1999, 4, 6), 999999, team_id, datetime(1999, 4, 13)),
+        )
+        first_id, second_id = [row["id"] for row in cursor.fetchall()]
+
+        assert weekly_totals(cursor, team_id) == [(WEEK_A, 3, 0, 1), (WEEK_B, 1, 6, 1)]
+        assert season_week(cursor, WEEK_A)[0] is True
+        assert season_week(cursor, WEEK_B)[0] is True
+        assert stat_range(cursor) == (datetime(1999, 4, 6), datetime(1999, 4, 13))
+        cursor.execute(
+            "SELECT txid = txid_current() AS current FROM data_versions WHERE name = 'stats'"
+        )
+        assert cursor.fetchone()["current"] is True
+
+        cursor.execute("UPDATE stats SET offense = 5 WHERE id = %s", (first_id,))
+        cursor.execute(
+            "UPDATE stats SET date = %s WHERE id = %s",
+            (datetime(1999, 4, 7), second_id),
+        )
+        assert weekly_totals(cursor, team_id) == [(WEEK_A, 6, 6, 2)]
+        assert season_week(cursor, WEEK_B)[0] is False
+        assert stat_range(cursor) == (datetime(1999, 4, 6), datetime(1999, 4, 7))
+
+        cursor.execute("DELETE FROM stats WHERE id = %s", (first_id,))
+        assert weekly_totals(cursor, team_id) == [(WEEK_A, 1, 6, 1)]
+        assert stat_range(cursor) == (datetime(1999, 4, 7), datetime(1999, 4, 7))
+
+        cursor.execute("TRUNCATE stats")
+        assert weekly_totals(cursor, team_id) == []
+        assert stat_range(cursor) is None
+
+        conn.rollback()
+
+
+def test_points_triggers_maintain_season_weeks():
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        team_id = seed_team(cursor)
+        cursor.execute(
+            """
+            INSERT INTO points (team_id, date, value, type)
+            VALUES (%s, %s, 10, 'offense')
+            RETURNING id
+            """,
+            (team_id, datetime(1999, 4, 11)),
+        )
+        point_id = cursor.fetchone()["id"]
+        assert season_week(cursor, WEEK_A)[1] is True
+
+        cursor.execute(
+            "UPDATE points SET date = %s WHERE id = %s",
+            (datetime(1999, 4, 18), point_id),
+        )
+        assert season_week(cursor, WEEK_A)[1] is False
+        assert season_week(cursor, WEEK_B)[1] is True
+
+        cursor.execute("DELETE FROM points WHERE id = %s", (point_id,))
+        assert season_week(cursor, WEEK_B)[1] is False
+
+        cursor.execute(
+            "INSERT INTO points (team_id, date, value, type) VALUES (%s, %s, 10, 'defense')",
+            (team_id, datetime(1999, 4, 11)),
+        )
+        cursor.execute("TRUNCATE points")
+        assert season_week(cursor, WEEK_A)[1] is False
+
+        conn.rollback()
+
+
+def test_roster_triggers_maintain_roster_events():
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        team_id = seed_team(cursor)
+        cursor.execute(
+            "INSERT INTO team_player (team_id, player_mlb_id) VALUES (%s, %s)",
+            (team_id, 999999),
+        )
+        cursor.execute(
+            """
+            INSERT INTO alumni (player_mlb_id, team_id, deactivated_at)
+            VALUES (%s, %s, %s)
+            RETURNING id
+            """,
+            (999999, team_id, datetime(1999, 4, 8)),
+        )
+        alumni_id = cursor.fetchone()["id"]
+
+        cursor.execute(
+            "SELECT action, source_table FROM roster_events WHERE team_id = %s ORDER BY action",
+            (team_id,),
+        )
+        assert [tuple(row.values()) for row in cursor.fetchall()] == [
+            ("add", "team_player"),
+            ("drop", "alumni"),
+        ]
+
+        cursor.execute("DELETE FROM alumni WHERE id = %s", (alumni_id,))
+        cursor.execute(
+            "SELECT action FROM roster_events WHERE team_id = %s",
+            (team_id,),
+        )
+        assert [row["action"] for row in cursor.fetchall()] == ["add"]
+
+        cursor.execute("DELETE FROM teams WHERE id = %s", (team_id,))
+        cursor.execute("SELECT COUNT(*) AS count FROM roster_events WHERE team_id = %s", (team_id,))
+        assert cursor.fetchone()["count"] == 0
+
+        conn.rollback()
+
+
+def test_load_leaderboard_reads_derived_tables():
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        team_id = seed_team(cursor)
+        cursor.execute(
+            """
+            INSERT INTO stats (player_mlb_id, team_id, date, offense, pitching)
+            VALUES (%s, %s, %s, 4, 9)
+            """,
+            (999999, team_id, datetime(1999, 4, 6)),
+        )
+        cursor.execute(
+            """
+            INSERT INTO points (team_id, date, value, type)
+            VALUES (%s, %s, 7, 'offense'), (%s, %s, 5, 'defense')
+            """,
+            (team_id, datetime(1999, 4, 11), team_id, datetime(1999, 4, 11)),
+        )
+
+        with app_module.app.app_context():
+            g.db_conn = conn
+            try:
+                (
+                    offense_rows,
+                    pitching_rows,
+                    week_starts,
+                    selected_week_start,
+                    offense_points,
+                    pitching_points,
+                    _,
+                    _,
+                ) = app_module.load_leaderboard(WEEK_A.isoformat())
+            finally:
+                g.pop("db_conn")
+
+        assert WEEK_A in week_starts
+        assert selected_week_start == WEEK_A
+        team = next(row for row in offense_rows if row["team_id"] == team_id)
+        assert (team["total_offense"], team["total_pitching"]) == (4, 9)
+        assert any(row["team_id"] == team_id for row in pitching_rows)
+        assert (offense_points[team_id], pitching_points[team_id]) == (7, 5)
+
+        conn.rollback()
+
+
+def test_forced_reassign_keeps_non_purchase_roster_events():
+    demo_league = load_demo_league_module()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        team_id = seed_team(cursor)
+        cursor.execute(
+            "INSERT INTO alumni (player_mlb_id, team_id, deactivated_at) VALUES (%s, %s, %s)",
+            (999999, team_id, datetime(1999, 4, 8)),
+        )
+
+        demo_league.assign_players_to_teams(conn, [team_id], force=True, seed=1)
+
+        cursor.execute(
+            "SELECT action, source_table FROM roster_events WHERE team_id = %s AND source_table = 'alumni'",
+            (team_id,),
+        )
+        assert [tuple(row.values()) for row in cursor.fetchall()] == [("drop", "alumni")]
+
+        conn.rollback()
@@ -0,0 +1,70 @@
+import psycopg
+from psycopg_pool import PoolTimeout
+
+from rate_limit import PostgresTokenBucketLimiter, TokenBucketLimiter
+
+
+def test_token_bucket_allows_burst_then_blocks():
+    limiter = TokenBucketLimiter()
+    assert limiter.allow("ip", 2, 60, now=0.0)
+    assert limiter.allow("ip", 2, 60, now=0.0)
+    assert not limiter.allow("ip", 2, 60, now=0.0)
+
+
+def test_token_bucket_refills_over_time():
+    limiter = TokenBucketLimiter()
+    assert limiter.allow("ip", 2, 60, now=0.0)
+    assert limiter.allow("ip", 2, 60, now=0.0)
+    assert not limiter.allow("ip", 2, 60, now=10.0)
+    assert limiter.allow("ip", 2, 60, now=40.0)
+
+
+def test_token_bucket_keys_are_independent():
+    limiter = TokenBucketLimiter()
+    assert limiter.allow("a", 1, 60, now=0.0)
+    assert not limiter.allow("a", 1, 60, now=0.0)
+    assert limiter.allow("b", 1, 60, now=0.0)
+
+
+def test_token_bucket_evicts_least_recently_used_keys():
+    limiter = TokenBucketLimiter(max_keys=2)
+    limiter.allow("a", 1, 60, now=0.0)
+    limiter.allow("b", 1, 60, now=1.0)
+    limiter.allow("a", 1, 60, now=2.0)
+    limiter.allow("c", 1, 60, now=3.0)
+    assert len(limiter) == 2
+    assert limiter.allow("b", 1, 60, now=4.0)
+
+
+def test_postgres_limiter_falls_back_when_pool_is_exhausted():
+    def exhausted_pool():
+        raise PoolTimeout("couldn't get a connection after 30.00 sec")
+
+    limiter = PostgresTokenBucketLimiter(exhausted_pool)
+    assert limiter.allow("ip", 1, 60)
+    assert not limiter.allow("ip", 1, 60)
+
+
+def test_postgres_limiter_uses_and_releases_its_own_connection():
+    class FailingConnection:
+        def __init__(self):
+            self.exited = False
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            self.exited = True
+
+        def cursor(self):
+            raise psycopg.OperationalError("server closed the connection")
+
+    conns = []
+
+    def get_conn():
+        conns.append(FailingConnection())
+        return conns[-1]
+
+    limiter = PostgresTokenBucketLimiter(get_conn)
+    assert limiter.allow("ip", 1, 60)
+    assert len(conns) == 1 and conns[0].exited
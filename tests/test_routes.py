@@ -1,10 +1,49 @@
+import gzip
 import os
+from datetime import date, datetime, timezone
 
 import pytest
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import BadRequest
 
+import app as app_module
 from app import app
 
 
+class FakeCursor:
+    def __init__(self, fetchone_results=(), fetchall_results=()):
+        self.fetchone_results = list(fetchone_results)
+        self.fetchall_results = list(fetchall_results)
+        self.executed = []
+
+    def execute(self, query, params=None):
+        self.executed.append((" ".join(query.split()), params))
+
+    def fetchone(self):
+        return self.fetchone_results.pop(0)
+
+    def fetchall(self):
+        return self.fetchall_results.pop(0)
+
+
+class FakeConnection:
+    def __init__(self, cursor=None):
+        self._cursor = cursor or FakeCursor()
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return None
+
+    def cursor(self):
+        return self._cursor
+
+    def close(self):
+        self.closed = True
+
+
 @pytest.fixture
 def client():
     app.config.update({"TESTING": True})
@@ -12,6 +51,16 @@ def client():
         yield client
 
 
+@pytest.fixture
+def fake_db(monkeypatch):
+    def install(fetchone=(), fetchall=(), target="get_db"):
+        conn = FakeConnection(FakeCursor(fetchone, fetchall))
+        monkeypatch.setattr(app_module, target, lambda: conn)
+        return conn.cursor()
+
+    return install
+
+
 def test_login_page_loads(client):
     resp = client.get("/login")
     assert resp.status_code == 200
@@ -39,3 +88,468 @@ def test_roster_requires_db(client):
         pytest.skip("DATABASE_URL not set.")
     resp = client.get("/")
     assert resp.status_code == 200
+
+
+def test_request_shares_one_connection(monkeypatch):
+    opened = []
+
+    def fake_get_connection():
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(app_module, "get_connection", fake_get_connection)
+    with app.app_context():
+        first = app_module.get_db()
+        assert app_module.get_db() is first
+    assert len(opened) == 1
+    assert opened[0].closed
+
+
+def test_active_session_count_is_cached(monkeypatch, fake_db):
+    cursor = fake_db(fetchone=[{"count": 3}])
+    monkeypatch.setattr(app_module, "ACTIVE_COUNT_CACHE", {"count": None, "expires_at": 0.0})
+    assert app_module.get_active_session_count() == 3
+    assert app_module.get_active_session_count() == 3
+    assert len(cursor.executed) == 1
+
+
+def test_heartbeat_reports_count_left_out_of_shared_pages(client, monkeypatch):
+    monkeypatch.setattr(app_module, "get_active_session_count", lambda: 4)
+    monkeypatch.setattr(app_module, "start_heartbeat_flusher", lambda: None)
+    monkeypatch.setattr(app_module, "HEARTBEAT_BUFFER", {})
+
+    resp = client.post("/heartbeat")
+    assert resp.get_json() == {"active_user_count": 5}
+
+    with app.test_request_context("/season"):
+        assert app_module.inject_nav_user_label()["active_user_count"] == 5
+        app_module.g.shared_page = True
+        assert app_module.inject_nav_user_label()["active_user_count"] is None
+
+
+def test_flush_heartbeats_batches_buffered_sessions(monkeypatch, fake_db):
+    cursor = fake_db(fetchone=[{"count": 2}], target="get_connection")
+    monkeypatch.setattr(app_module, "HEARTBEAT_STATE", {"flusher": None, "last_cleanup": None})
+    monkeypatch.setattr(app_module, "ACTIVE_COUNT_CACHE", {"count": None, "expires_at": 0.0})
+    monkeypatch.setattr(
+        app_module,
+        "HEARTBEAT_BUFFER",
+        {
+            "a": {"user_id": 1, "user_agent": "ua", "ip_address": "1.1.1.1", "seen_at": 0.0},
+            "b": {"user_id": None, "user_agent": "ub", "ip_address": "2.2.2.2", "seen_at": 0.0},
+        },
+    )
+    app_module.flush_heartbeats()
+
+    statements = [query.split()[0] for query, _ in cursor.executed]
+    assert statements == ["INSERT", "DELETE", "SELECT"]
+    assert cursor.executed[0][1][0] == ["a", "b"]
+    assert app_module.HEARTBEAT_BUFFER == {}
+    assert app_module.ACTIVE_COUNT_CACHE["count"] == 2
+
+    cursor.executed.clear()
+    app_module.flush_heartbeats()
+    assert cursor.executed == []
+
+
+def test_load_user_is_cached_until_invalidated(monkeypatch, fake_db):
+    row = {
+        "id": 7,
+        "email": "owner@example.com",
+        "role": "owner",
+        "team_id": 3,
+        "is_active": 1,
+        "team_name": "Sluggers",
+    }
+    cursor = fake_db(fetchone=[dict(row), dict(row)])
+    monkeypatch.setattr(app_module, "USER_CACHE", app_module.OrderedDict())
+    monkeypatch.setattr(app_module, "USER_CACHE_STATE", {"listener": object()})
+
+    user = app_module.load_user("7")
+    assert user.team_name == "Sluggers"
+    assert app_module.load_user("7") is user
+    assert len(cursor.executed) == 1
+
+    app_module.invalidate_cached_user(7)
+    assert app_module.load_user("7") is not user
+    assert len(cursor.executed) == 2
+
+
+def test_cached_page_serves_hits_until_data_version_changes(monkeypatch):
+    versions = {"stats": {"version": 1, "updated_at": None}}
+    calls = []
+
+    def view():
+        calls.append(1)
+        return f"rendered {len(calls)}"
+
+    monkeypatch.setattr(app_module, "RESPONSE_CACHE", app_module.OrderedDict())
+    monkeypatch.setattr(app_module, "RESPONSE_CACHE_STATE", {"bytes": 0})
+    monkeypatch.setattr(app_module, "get_data_versions", lambda: versions)
+    cached_view = app_module.cached_page(60, ("stats",))(view)
+
+    with app.test_request_context("/week?week_start=2025-04-07"):
+        assert cached_view().get_data() == b"rendered 1"
+    with app.test_request_context("/week?week_start=2025-04-07"):
+        response = cached_view()
+        assert response.get_data() == b"rendered 1"
+        assert response.headers["X-Cache"] == "HIT"
+
+    versions["stats"] = {"version": 2, "updated_at": None}
+    with app.test_request_context("/week?week_start=2025-04-07"):
+        assert cached_view().get_data() == b"rendered 2"
+    assert len(calls) == 2
+
+
+def test_conditional_page_returns_304_for_matching_etag(monkeypatch):
+    versions = {"points": {"version": 4, "updated_at": datetime(2030, 1, 1, tzinfo=timezone.utc)}}
+    calls = []
+
+    def view():
+        calls.append(1)
+        return "standings"
+
+    monkeypatch.setattr(app_module, "get_data_versions", lambda: versions)
+    conditional_view = app_module.conditional_page(("points",))(view)
+
+    with app.test_request_context("/season"):
+        response = conditional_view()
+        etag, _ = response.get_etag()
+        assert response.status_code == 200
+        assert response.last_modified == datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+    with app.test_request_context("/season", headers={"If-None-Match": f'"{etag}"'}):
+        assert conditional_view().status_code == 304
+
+    with app.test_request_context("/season?team_id=2", headers={"If-None-Match": f'"{etag}"'}):
+        assert conditional_view().status_code == 200
+
+    with app.test_request_context(
+        "/season", headers={"If-Modified-Since": "Tue, 01 Jan 2030 00:00:00 GMT"}
+    ):
+        assert conditional_view().status_code == 304
+
+    versions["points"] = {"version": 5, "updated_at": datetime(2030, 1, 2, tzinfo=timezone.utc)}
+    with app.test_request_context("/season", headers={"If-None-Match": f'"{etag}"'}):
+        assert conditional_view().status_code == 200
+    assert len(calls) == 3
+
+
+def test_conditional_page_validators_change_with_deploy(monkeypatch):
+    monkeypatch.setattr(app_module, "get_data_versions", lambda: {})
+    started_at = datetime(2030, 1, 1, 12, 0, tzinfo=timezone.utc)
+    monkeypatch.setattr(app_module, "PROCESS_STARTED_AT", started_at)
+    conditional_view = app_module.conditional_page(("points",))(lambda: "standings")
+
+    with app.test_request_context("/season"):
+        response = conditional_view()
+        etag, _ = response.get_etag()
+        assert response.last_modified == started_at
+
+    monkeypatch.setattr(app_module, "DEPLOY_VERSION", "next-deploy")
+    with app.test_request_context("/season", headers={"If-None-Match": f'"{etag}"'}):
+        assert conditional_view().status_code == 200
+
+
+def test_cache_user_starts_change_listener(monkeypatch):
+    started = []
+    monkeypatch.setattr(app_module, "USER_CACHE", app_module.OrderedDict())
+    monkeypatch.setattr(app_module, "start_user_change_listener", lambda: started.append(1))
+
+    app_module.cache_user(app_module.AuthUser(7, "owner@example.com", "owner", 3, 1, "Sluggers"))
+    assert started == [1]
+    assert "7" in app_module.USER_CACHE
+
+
+def test_load_team_stats_folds_rows_in_one_pass(fake_db):
+    cursor = fake_db(
+        fetchall=[
+            [{"id": 1, "name": "Sluggers"}],
+            [
+                {"player_id": 10, "player_name": "Ace"},
+                {"player_id": 11, "player_name": "Bench"},
+            ],
+            [
+                {"date": datetime(2025, 4, 2), "offense": 3, "pitching": 0, "player_id": 10, "player_name": "Ace"},
+                {"date": datetime(2025, 4, 1), "offense": 2, "pitching": 6, "player_id": 12, "player_name": "Gone"},
+            ],
+        ]
+    )
+    teams, team_id, team_name, rows, totals, player_totals = app_module.load_team_stats()
+
+    assert (team_id, team_name) == (1, "Sluggers")
+    assert "COALESCE(s.offense, 0) != 0 OR COALESCE(s.pitching, 0) != 0" in cursor.executed[-1][0]
+    assert [row["date"] for row in rows] == [datetime(2025, 4, 2), datetime(2025, 4, 1)]
+    assert totals == {"total_offense": 5, "total_pitching": 6}
+    assert [(p["player_id"], p["total_offense"], p["total_pitching"]) for p in player_totals] == [
+        (10, 3, 0),
+        (11, 0, 0),
+    ]
+
+
+def test_load_team_roster_history_reads_roster_events(fake_db):
+    cursor = fake_db(
+        fetchall=[
+            [
+                {"event_time": datetime(2025, 5, 3, 9, 0), "action": "drop", "reason": "Removed from MLB 40-man", "player_name": "Ace"},
+                {"event_time": datetime(2025, 4, 1, 12, 0), "action": "add", "reason": "Purchased at auction", "player_name": "Ace"},
+            ]
+        ]
+    )
+    history = app_module.load_team_roster_history(7)
+
+    assert [params for _, params in cursor.executed] == [(7,)]
+    assert [(item["event_time"], item["action"]) for item in history] == [
+        (datetime(2025, 5, 3, 9, 0), "Dropped"),
+        (datetime(2025, 4, 1, 12, 0), "Added"),
+    ]
+
+
+def test_load_player_details_uses_date_range(fake_db):
+    cursor = fake_db(
+        fetchone=[
+            {"mlb_id": 5, "name": "Ace", "position_name": "Pitcher", "team_id": None, "team_name": None},
+            {"first_date": datetime(2025, 3, 28)},
+        ],
+        fetchall=[[{"date": datetime(2025, 4, 2), "offense": 0, "pitching": 7}]],
+    )
+    player, stats_rows, year, show_offense, show_pitching = app_module.load_player_details(5)
+
+    assert player["display_position"] == "Pitcher"
+    assert year == 2025
+    assert "LIKE" not in cursor.executed[-1][0]
+    assert cursor.executed[-1][1] == (5, datetime(2025, 1, 1), datetime(2026, 1, 1))
+    assert stats_rows[0]["date"] == datetime(2025, 4, 2)
+    assert (show_offense, show_pitching) == (False, True)
+
+
+def test_load_audit_pages_by_keyset(fake_db):
+    cursor = fake_db(
+        fetchone=[{"estimate": 3}],
+        fetchall=[
+            [
+                {"id": 3, "datetime": datetime(2025, 4, 3)},
+                {"id": 2, "datetime": datetime(2025, 4, 2)},
+                {"id": 1, "datetime": datetime(2025, 4, 1)},
+            ]
+        ],
+    )
+    page_rows, has_prev, has_next, total_pages = app_module.load_audit(
+        before=(datetime(2025, 4, 4), 4), page_size=2
+    )
+
+    assert [row["id"] for row in page_rows] == [3, 2]
+    assert (has_prev, has_next, total_pages) == (True, True, 2)
+    assert "OFFSET" not in cursor.executed[-1][0]
+    assert cursor.executed[-1][1] == (datetime(2025, 4, 4), 4, 3)
+
+
+def test_load_audit_filters_lead_with_indexed_columns(fake_db):
+    cursor = fake_db(fetchone=[{"id": 9}], fetchall=[[]])
+    filters = {"table": "team_player", "user": "gm@example.com", "start": "2025-04-01", "end": "2025-04-30"}
+    rows, has_prev, has_next, total_pages = app_module.load_audit(filters=filters)
+
+    query, params = cursor.executed[-1]
+    assert "table_name = %s AND user_id = %s AND datetime >= %s AND datetime < %s" in query
+    assert params == ("team_player", 9, datetime(2025, 4, 1), datetime(2025, 5, 1), 51)
+    assert (rows, has_prev, has_next, total_pages) == ([], False, False, None)
+
+
+def test_parse_audit_filters_rejects_unknown_table():
+    assert app_module.parse_audit_filters(MultiDict({"table": "stats", "operation": "insert"})) == {
+        "table": "stats",
+        "operation": "INSERT",
+    }
+    assert app_module.parse_audit_filters(MultiDict({"table": "user_accounts"})) == {
+        "table": "user_accounts",
+    }
+    with pytest.raises(BadRequest):
+        app_module.parse_audit_filters(MultiDict({"table": "active_sessions"}))
+
+
+def test_rules_html_is_cached_by_mtime_and_size(monkeypatch, tmp_path):
+    rules_path = tmp_path / "rules.md"
+    rules_path.write_text("# Rules\n", encoding="utf-8")
+    renders = []
+    real_markdown = app_module.markdown.markdown
+
+    def counting_markdown(text, **kwargs):
+        renders.append(text)
+        return real_markdown(text, **kwargs)
+
+    monkeypatch.setattr(app_module, "RULES_PATH", rules_path)
+    monkeypatch.setattr(app_module, "RULES_CACHE", {"key": None, "html": None})
+    monkeypatch.setattr(app_module.markdown, "markdown", counting_markdown)
+
+    first = app_module.load_rules_html()
+    assert app_module.load_rules_html() == first
+    assert len(renders) == 1
+
+    rules_path.write_text("# Rules\n\nNo trades.\n", encoding="utf-8")
+    assert "No trades." in app_module.load_rules_html()
+    assert len(renders) == 2
+
+    rules_path.unlink()
+    assert app_module.load_rules_html() is None
+
+
+def test_api_week_returns_compact_json_with_validators(client, monkeypatch):
+    monkeypatch.setattr(app_module, "get_data_versions", lambda: {})
+    monkeypatch.setattr(app_module, "RESPONSE_CACHE", app_module.OrderedDict())
+    monkeypatch.setattr(
+        app_module,
+        "load_leaderboard",
+        lambda week_start=None: (
+            [{"team_id": 1, "team_name": "Sluggers", "total_offense": 12, "total_pitching": 0}],
+            [{"team_id": 1, "team_name": "Sluggers", "total_offense": 12, "total_pitching": 0}],
+            [date(2025, 4, 7)],
+            date(2025, 4, 7),
+            {1: 5},
+            {},
+            True,
+            False,
+        ),
+    )
+
+    resp = client.get("/api/week?week_start=2025-04-07")
+    assert resp.status_code == 200
+    assert resp.get_json() == {
+        "week_start": "2025-04-07",
+        "weeks": ["2025-04-07"],
+        "offense": [{"id": 1, "name": "Sluggers", "total": 12, "points": 5}],
+        "pitching": [{"id": 1, "name": "Sluggers", "total": 0}],
+    }
+    assert resp.headers["Cache-Control"] == "max-age=30"
+
+    cached = client.get("/api/week?week_start=2025-04-07", headers={"If-None-Match": resp.headers["ETag"]})
+    assert cached.status_code == 304
+
+
+def test_api_week_falls_back_to_latest_week_like_html(client, monkeypatch):
+    monkeypatch.setattr(app_module, "get_data_versions", lambda: {})
+    monkeypatch.setattr(app_module, "RESPONSE_CACHE", app_module.OrderedDict())
+    monkeypatch.setattr(
+        app_module,
+        "load_leaderboard",
+        lambda week_start=None: ([], [], [date(2025, 4, 7)], date(2025, 4, 7), {}, {}, False, False),
+    )
+
+    resp = client.get("/api/week?week_start=1999-01-04")
+    assert resp.status_code == 200
+    assert resp.get_json()["week_start"] == "2025-04-07"
+
+
+def test_api_team_returns_iso_dates(client, monkeypatch):
+    monkeypatch.setattr(app_module, "get_data_versions", lambda: {})
+    monkeypatch.setattr(app_module, "RESPONSE_CACHE", app_module.OrderedDict())
+    monkeypatch.setattr(
+        app_module,
+        "load_team_stats",
+        lambda team_id=None: (
+            [],
+            team_id,
+            "Sluggers",
+            [{"date": datetime(2025, 4, 2), "player_id": 10, "offense": 3, "pitching": None}],
+            {"total_offense": 3, "total_pitching": None},
+            [],
+        ),
+    )
+    monkeypatch.setattr(
+        app_module,
+        "load_team_roster_history",
+        lambda team_id: [
+            {"event_time": datetime(2025, 4, 1, 12, 0), "player_name": "Ace", "action": "Added", "reason": "Purchased at auction"}
+        ],
+    )
+
+    data = client.get("/api/team/1").get_json()
+    assert data["daily"][0]["date"] == "2025-04-02"
+    assert data["roster_history"][0]["event_time"] == "2025-04-01"
+    assert app_module.display_date(datetime(2025, 4, 2)) == "Apr 2, 2025"
+
+
+def test_api_player_returns_404_for_unknown_player(client, monkeypatch):
+    monkeypatch.setattr(app_module, "get_data_versions", lambda: {})
+    monkeypatch.setattr(app_module, "RESPONSE_CACHE", app_module.OrderedDict())
+    monkeypatch.setattr(
+        app_module, "load_player_details", lambda player_id: (None, [], None, False, False)
+    )
+
+    assert client.get("/api/player/123").status_code == 404
+
+
+def test_large_json_responses_are_gzipped(client, monkeypatch):
+    monkeypatch.setattr(app_module, "get_data_versions", lambda: {})
+    monkeypatch.setattr(app_module, "RESPONSE_CACHE", app_module.OrderedDict())
+    rows = [
+        {"team_id": team_id, "team_name": f"Team {team_id}", "offense_points": 1, "pitching_points": 2, "total_points": 3}
+        for team_id in range(1, 60)
+    ]
+    monkeypatch.setattr(app_module, "load_season_totals", lambda: rows)
+
+    plain = client.get("/api/season")
+    assert "Content-Encoding" not in plain.headers
+
+    resp = client.get("/api/season", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert resp.headers["ETag"].startswith('W/"')
+    assert gzip.decompress(resp.data) == plain.data
+
+    revalidated = client.get(
+        "/api/season", headers={"Accept-Encoding": "gzip", "If-None-Match": resp.headers["ETag"]}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == resp.headers["ETag"]
+    assert "Accept-Encoding" in revalidated.headers["Vary"]
+
+
+def test_cache_hits_reuse_compressed_bodies(client, monkeypatch):
+    monkeypatch.setattr(app_module, "get_data_versions", lambda: {})
+    monkeypatch.setattr(app_module, "RESPONSE_CACHE", app_module.OrderedDict())
+    monkeypatch.setattr(app_module, "RESPONSE_CACHE_STATE", {"bytes": 0})
+    rows = [
+        {"team_id": team_id, "team_name": f"Team {team_id}", "offense_points": 1, "pitching_points": 2, "total_points": 3}
+        for team_id in range(1, 60)
+    ]
+    monkeypatch.setattr(app_module, "load_season_totals", lambda: rows)
+    calls = []
+    compress_body = app_module.compress_body
+
+    def counting_compress_body(body, encoding, level=None):
+        calls.append(encoding)
+        return compress_body(body, encoding, level)
+
+    monkeypatch.setattr(app_module, "compress_body", counting_compress_body)
+
+    plain = client.get("/api/season", headers={"Accept-Encoding": "gzip"})
+    assert plain.headers["X-Cache"] == "MISS"
+    for _ in range(2):
+        hit = client.get("/api/season", headers={"Accept-Encoding": "gzip"})
+        assert hit.headers["X-Cache"] == "HIT"
+        assert hit.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(hit.data) == gzip.decompress(plain.data)
+    assert calls == ["gzip", "gzip"]
+
+    entry = next(iter(app_module.RESPONSE_CACHE.values()))
+    assert app_module.RESPONSE_CACHE_STATE["bytes"] == len(entry["body"]) + len(entry["encoded"]["gzip"])
+
+
+def test_fingerprinted_static_serves_precompressed_file(client, monkeypatch, tmp_path):
+    (tmp_path / "styles.abc123.css").write_text("body { color: red; }", encoding="utf-8")
+    (tmp_path / "styles.abc123.css.gz").write_bytes(gzip.compress(b"body { color: red; }"))
+    monkeypatch.setattr(app_module, "STATIC_DIST_DIR", tmp_path)
+
+    resp = client.get("/static/dist/styles.abc123.css", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert resp.mimetype == "text/css"
+    assert "immutable" in resp.headers["Cache-Control"]
+    assert gzip.decompress(resp.data) == b"body { color: red; }"
+    resp.close()
+
+    resp = client.get("/static/dist/styles.abc123.css")
+    assert "Content-Encoding" not in resp.headers
+    assert resp.data == b"body { color: red; }"
+    resp.close()
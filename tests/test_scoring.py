@@ -48,3 +48,150 @@ def test_award_points_tie_third_awards_all_third():
     points = {1: 10, 2: 8, 3: 4}
     awards = dict(scoring.award_points_for_category(totals, points))
     assert awards == {1: 10, 2: 8, 3: 4, 4: 4, 5: 4}
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+def test_load_weekly_totals_reads_aggregated_weeks():
+    scoring = load_scoring_module()
+    cursor = FakeCursor(
+        [
+            {"week_start": date(2025, 4, 7), "team_id": 1, "offense": 12, "pitching": 30},
+            {"week_start": date(2025, 4, 7), "team_id": 2, "offense": 8, "pitching": 41},
+        ]
+    )
+    weekly = scoring.load_weekly_totals(
+        FakeConnection(cursor), week_starts=[date(2025, 4, 7)], league_id=3
+    )
+
+    assert weekly == {
+        date(2025, 4, 7): {
+            1: {"offense": 12, "pitching": 30},
+            2: {"offense": 8, "pitching": 41},
+        }
+    }
+    assert cursor.executed[0][1] == [[date(2025, 4, 7)], 3]
+
+
+class ScriptedCursor:
+    def __init__(self, results):
+        self.results = results
+        self.executed = []
+        self.inserted = []
+
+    def execute(self, query, params=None):
+        self.executed.append((" ".join(query.split()), params))
+
+    def fetchall(self):
+        return self.results.pop(0)
+
+    def __iter__(self):
+        return iter(self.results.pop(0))
+
+    def executemany(self, query, rows):
+        self.inserted.extend(rows)
+
+
+class ScriptedConnection(FakeConnection):
+    def commit(self):
+        return None
+
+
+def test_score_weeks_scores_unscored_weeks_per_league(monkeypatch):
+    scoring = load_scoring_module()
+    monkeypatch.setattr(scoring, "ensure_identities", lambda conn, tables: None)
+    cursor = ScriptedCursor(
+        [
+            [{"league_id": 1}],
+            [{"week_start": date(2025, 4, 14)}],
+            [
+                {"week_start": date(2025, 4, 14), "team_id": 1, "offense": 9, "pitching": 20},
+                {"week_start": date(2025, 4, 14), "team_id": 2, "offense": 5, "pitching": 25},
+            ],
+        ]
+    )
+    scoring.score_weeks(conn=ScriptedConnection(cursor))
+
+    assert len(cursor.executed) == 3
+    assert "HAVING NOT EXISTS" in cursor.executed[1][0]
+    assert cursor.executed[1][1] == {"league_id": 1, "week_start": None}
+    assert cursor.executed[2][1] == [[date(2025, 4, 14)], 1]
+    assert sorted(cursor.inserted) == [
+        (1, "2025-04-20", 8, "defense"),
+        (1, "2025-04-20", 10, "offense"),
+        (2, "2025-04-20", 8, "offense"),
+        (2, "2025-04-20", 10, "defense"),
+    ]
+
+
+def test_diff_point_rows_only_returns_changes():
+    scoring = load_scoring_module()
+    point_rows = [
+        (1, "2025-04-20", 10, "offense"),
+        (2, "2025-04-20", 8, "offense"),
+        (3, "2025-04-20", 4, "offense"),
+    ]
+    stored = {
+        (1, "2025-04-20", "offense"): (101, 10),
+        (2, "2025-04-20", "offense"): (102, 4),
+        (4, "2025-04-20", "offense"): (104, 8),
+    }
+    upserts, deletes = scoring.diff_point_rows(point_rows, stored)
+
+    assert upserts == [(2, "2025-04-20", 8, "offense"), (3, "2025-04-20", 4, "offense")]
+    assert deletes == [104]
+
+
+def test_award_points_batch_handles_ties_and_missing_teams():
+    scoring = load_scoring_module()
+    matrix = [
+        [12, 9, 9, 5],
+        [None, 3, 7, 7],
+    ]
+    awards = scoring.award_points_batch(matrix, {1: 10, 2: 8, 3: 4})
+
+    assert sorted(awards) == [
+        (0, 0, 10),
+        (0, 1, 8),
+        (0, 2, 8),
+        (1, 1, 4),
+        (1, 2, 10),
+        (1, 3, 10),
+    ]
+
+
+def test_score_weeks_ranks_each_league_separately(monkeypatch):
+    scoring = load_scoring_module()
+    monkeypatch.setattr(scoring, "ensure_identities", lambda conn, tables: None)
+    cursor = ScriptedCursor(
+        [
+            [{"league_id": 1}, {"league_id": 2}],
+            [{"week_start": date(2025, 4, 14)}],
+            [{"week_start": date(2025, 4, 14), "team_id": 1, "offense": 9, "pitching": 0}],
+            [{"week_start": date(2025, 4, 14)}],
+            [{"week_start": date(2025, 4, 14), "team_id": 7, "offense": 2, "pitching": 0}],
+        ]
+    )
+    results = scoring.score_weeks(conn=ScriptedConnection(cursor), workers=4)
+
+    assert [result[0] for result in results] == [1, 2]
+    offense = sorted(row for row in cursor.inserted if row[3] == "offense")
+    assert offense == [(1, "2025-04-20", 10, "offense"), (7, "2025-04-20", 10, "offense")]